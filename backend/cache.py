@@ -2,6 +2,13 @@
 from typing import Optional, Any
 import json
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
+
 try:
     import redis.asyncio as redis
     from redis.asyncio import Redis
@@ -78,7 +85,7 @@ async def get_cache(key: str) -> Optional[Any]:
             return None
         value = await redis_client.get(key)
         if value:
-            return json.loads(value)
+            return orjson.loads(value) if HAS_ORJSON else json.loads(value)
         return None
     except Exception:
         return None
@@ -102,7 +109,10 @@ async def set_cache(key: str, value: Any, expire: Optional[int] = None) -> bool:
         redis_client = await get_redis()
         if not redis_client:
             return False
-        serialized = json.dumps(value, default=str)
+        if HAS_ORJSON:
+            serialized = orjson.dumps(value, default=str)
+        else:
+            serialized = json.dumps(value, default=str)
         if expire:
             await redis_client.setex(key, expire, serialized)
         else:
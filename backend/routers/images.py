@@ -1,6 +1,6 @@
 """Image routes."""
 import base64
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
@@ -20,6 +20,13 @@ except ImportError:
 
 router = APIRouter(prefix="/api/drones", tags=["Images"])
 
+# Raw pixel formats served by /image/raw, mapped to the cv2 conversion from the client's BGR frames
+RAW_FORMATS = {
+    "rgba8": (4, cv2.COLOR_BGR2RGBA if HAS_CV2 else None),
+    "rgb8": (3, cv2.COLOR_BGR2RGB if HAS_CV2 else None),
+    "bgr8": (3, None),
+}
+
 
 @router.get("/{drone_id}/image", response_model=ResponseModel[dict])
 async def get_drone_image(
@@ -142,3 +149,74 @@ async def fetch_drone_image(
             detail=f"Error fetching image: {str(e)}"
         )
 
+
+@router.get("/{drone_id}/image/raw")
+async def get_drone_image_raw(
+    drone_id: int,
+    format: str = Query("rgba8", description="Pixel format: rgba8, rgb8 or bgr8"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get latest camera image as raw, already-decoded pixels.
+    
+    The body is the H*W*C byte buffer; dimensions are returned in headers so
+    the caller can upload it directly without JPEG/base64 decoding.
+    """
+    if format not in RAW_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format: {format}"
+        )
+    
+    drone = await DroneService.get_drone(db, drone_id)
+    if not drone:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Drone not found"
+        )
+    
+    client = DroneService.get_drone_client(drone_id)
+    if not client or not client.is_connected():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Drone not connected"
+        )
+    
+    try:
+        image_data = client.get_latest_image()
+        if not image_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No image available"
+            )
+        
+        frame, timestamp = image_data
+        channels, conversion = RAW_FORMATS[format]
+        
+        if conversion is not None:
+            if not HAS_CV2:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="OpenCV not available"
+                )
+            frame = cv2.cvtColor(frame, conversion)
+        
+        return Response(
+            content=frame.tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Image-Width": str(frame.shape[1]),
+                "X-Image-Height": str(frame.shape[0]),
+                "X-Image-Channels": str(channels),
+                "X-Image-Format": format,
+                "X-Timestamp": str(timestamp),
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting raw image: {str(e)}"
+        )
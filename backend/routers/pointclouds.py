@@ -1,5 +1,5 @@
 """Point cloud routes."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
@@ -130,3 +130,70 @@ async def fetch_drone_pointcloud(
             detail=f"Error fetching point cloud: {str(e)}"
         )
 
+
+@router.get("/{drone_id}/pointcloud/raw")
+async def get_drone_pointcloud_raw(
+    drone_id: int,
+    max_points: int = Query(0, ge=0, description="Randomly sample down to this many points (0 = all)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get latest point cloud as a packed binary buffer.
+    
+    The body is a little-endian float32 array of shape (N, 3) (x, y, z per
+    point); the point count is returned in the X-Point-Count header so the
+    caller can np.frombuffer(...).reshape(-1, 3) without JSON parsing.
+    """
+    if not HAS_NUMPY:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="NumPy not available"
+        )
+    
+    drone = await DroneService.get_drone(db, drone_id)
+    if not drone:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Drone not found"
+        )
+    
+    client = DroneService.get_drone_client(drone_id)
+    if not client or not client.is_connected():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Drone not connected"
+        )
+    
+    try:
+        pc_data = client.get_latest_point_cloud()
+        if not pc_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No point cloud available"
+            )
+        
+        points, timestamp = pc_data
+        
+        if max_points and len(points) > max_points:
+            indices = np.random.choice(len(points), max_points, replace=False)
+            points = points[indices]
+        
+        xyz = np.ascontiguousarray(np.asarray(points)[:, :3], dtype="<f4")
+        
+        return Response(
+            content=xyz.tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Point-Count": str(xyz.shape[0]),
+                "X-Point-Dtype": "float32",
+                "X-Timestamp": str(timestamp),
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting raw point cloud: {str(e)}"
+        )
@@ -12,10 +12,16 @@ if str(project_root) not in sys.path:
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+try:
+    import orjson  # noqa: F401
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from .config import settings
 from .database import init_db, close_db
 from .cache import close_redis
@@ -47,6 +53,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# orjson serializes polled status/image payloads several times faster than stdlib json
+DefaultResponse = ORJSONResponse if HAS_ORJSON else JSONResponse
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -94,6 +103,7 @@ app = FastAPI(
     description="Professional Multi-Drone Management and Control Platform with LLM Agent Support",
     version=settings.APP_VERSION,
     lifespan=lifespan,
+    default_response_class=DefaultResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -118,7 +128,7 @@ app.add_middleware(RequestIdMiddleware)
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """Handle HTTP exceptions."""
-    return JSONResponse(
+    return DefaultResponse(
         status_code=exc.status_code,
         content=ErrorResponse(
             status=exc.status_code,
@@ -131,7 +141,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors."""
-    return JSONResponse(
+    return DefaultResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content=ErrorResponse(
             status=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -146,7 +156,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 async def global_exception_handler(request: Request, exc: Exception):
     """Handle all other exceptions."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return DefaultResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content=ErrorResponse(
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
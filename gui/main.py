@@ -16,6 +16,7 @@ import time
 import math
 from typing import Optional, Dict, Any, List
 import queue
+from collections import deque
 
 try:
     from rosclient import RosClient, MockRosClient, DroneState, ConnectionState
@@ -84,6 +85,13 @@ class RosClientPygameGUI:
         self.running = True
         self.dt = 0
         
+        # Adaptive frame rate: full rate while there is input or new data, otherwise
+        # block on the event queue and redraw at the idle rate
+        self.idle_frame_ms = 100  # ~10 FPS when idle
+        self.idle_after = 0.5  # seconds without input before dropping to the idle rate
+        self._last_input_time = time.time()
+        self._last_frame_data: tuple = ()
+        
         # Multi-drone client state
         self.drones: Dict[str, Dict[str, Any]] = {}
         self.current_drone_id: Optional[str] = None
@@ -98,6 +106,8 @@ class RosClientPygameGUI:
         self.stop_update = threading.Event()
         self.image_queue = queue.Queue(maxsize=1)
         self.current_image = None
+        # Set by image workers when a new frame is ready; the main loop publishes it to the tabs
+        self.image_dirty = threading.Event()
         
         # Tabs
         self.tabs = ["Connection", "Status", "Image", "Control", "Point Cloud", "3D View", "Map", "Network Test", "ROS Bag"]
@@ -120,7 +130,7 @@ class RosClientPygameGUI:
             'pc_camera': (0.0, 0.0, 1.0),
             'pc_last_interaction_time': 0.0,
             'pc_interaction_throttle': 0.016,
-            'command_history': [],
+            'command_history': deque(maxlen=15),  # sized to the control tab's history view
             'test_results': [],
             'connection_logs': [],
             'status_data': {},
@@ -185,6 +195,16 @@ class RosClientPygameGUI:
         self.image_last_update_time = 0.0
         self.image_update_interval = 0.033  # ~30 FPS
         
+        # Raw status snapshot behind the current status_data; formatting is skipped while it is unchanged
+        self._status_key: Optional[tuple] = None
+        
+        # Preallocated image surfaces (triple-buffered, reallocated only on size change).
+        # Under image_cache_lock a worker writes only a surface that is neither the
+        # published frame (current_image) nor the one the render loop is drawing.
+        self._image_surfaces: List[pygame.Surface] = []
+        self._image_surface_size: Optional[tuple] = None
+        self._displayed_image: Optional[pygame.Surface] = None
+        
         # Initialize point cloud renderer
         if HAS_POINTCLOUD:
             self.pc_renderer = PointCloudRenderer(width=800, height=600)
@@ -505,6 +525,13 @@ class RosClientPygameGUI:
                 if len(drone_info['trajectory']) > 1000:
                     drone_info['trajectory'] = drone_info['trajectory'][-1000:]
             
+            status_key = (self.current_drone_id, state.connected, state.armed, state.mode,
+                          state.battery, state.landed, state.reached, state.returned,
+                          state.tookoff, pos, ori)
+            if status_key == self._status_key:
+                return
+            self._status_key = status_key
+            
             status_data = {
                 "connected": ("Connected" if state.connected else "Disconnected",
                              DesignSystem.COLORS['success'] if state.connected else DesignSystem.COLORS['error']),
@@ -560,20 +587,7 @@ class RosClientPygameGUI:
                 image_data = client.get_latest_image()
                 if image_data:
                     frame, timestamp = image_data
-                    max_width, max_height = 800, 600
-                    h, w = frame.shape[:2]
-                    scale = min(max_width / w, max_height / h)
-                    new_w, new_h = int(w * scale), int(h * scale)
-                    frame_resized = cv2.resize(frame, (new_w, new_h))
-                    frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
-                    frame_rotated = np.rot90(frame_rgb, k=3)
-                    frame_flipped = np.fliplr(frame_rotated)
-                    new_image = pygame.surfarray.make_surface(frame_flipped)
-                    
-                    with self.image_cache_lock:
-                        self.image_cache = new_image
-                        self.current_image = new_image
-                        self.app_state['current_image'] = new_image
+                    self.frame_to_surface(frame)
                     self.image_last_update_time = time.time()
             except Exception:
                 pass
@@ -581,6 +595,41 @@ class RosClientPygameGUI:
         self.image_thread = threading.Thread(target=update_image_thread, daemon=True)
         self.image_thread.start()
     
+    def frame_to_surface(self, frame) -> pygame.Surface:
+        """Convert a BGR frame into a preallocated surface and publish it as current_image.
+        
+        Surfaces are only allocated when the display size changes; otherwise the
+        pixels are written with blit_array into a free buffer. Buffer choice, the
+        write and the hand-off all happen under image_cache_lock, and the buffer
+        being drawn by the render loop is never written. The surface identity
+        still changes per frame, so display caches keyed on it are invalidated.
+        """
+        max_width, max_height = 800, 600
+        h, w = frame.shape[:2]
+        scale = min(max_width / w, max_height / h)
+        new_w, new_h = int(w * scale), int(h * scale)
+        frame_resized = cv2.resize(frame, (new_w, new_h))
+        frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
+        
+        # surfarray is indexed (x, y): a transposed view replaces the rot90 + fliplr copies
+        pixels = frame_rgb.swapaxes(0, 1)
+        
+        size = (new_w, new_h)
+        with self.image_cache_lock:
+            if self._image_surface_size != size:
+                self._image_surfaces = [pygame.Surface(size) for _ in range(3)]
+                self._image_surface_size = size
+            published, displayed = self.current_image, self._displayed_image
+            surface = next(
+                s for s in self._image_surfaces
+                if s is not published and s is not displayed
+            )
+            pygame.surfarray.blit_array(surface, pixels)
+            self.image_cache = surface
+            self.current_image = surface
+        self.image_dirty.set()
+        return surface
+    
     def update_pointcloud_async(self):
         """Update point cloud display asynchronously with caching."""
         if self.current_drone_id is None:
@@ -642,20 +691,7 @@ class RosClientPygameGUI:
             if image_data:
                 frame, timestamp = image_data
                 if frame is not None and HAS_CV2:
-                    max_width, max_height = 800, 600
-                    h, w = frame.shape[:2]
-                    scale = min(max_width / w, max_height / h)
-                    new_w, new_h = int(w * scale), int(h * scale)
-                    frame_resized = cv2.resize(frame, (new_w, new_h))
-                    frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
-                    frame_rotated = np.rot90(frame_rgb, k=3)
-                    frame_flipped = np.fliplr(frame_rotated)
-                    new_image = pygame.surfarray.make_surface(frame_flipped)
-                    
-                    with self.image_cache_lock:
-                        self.image_cache = new_image
-                        self.current_image = new_image
-                        self.app_state['current_image'] = new_image
+                    self.frame_to_surface(frame)
         except Exception as e:
             pass
     
@@ -938,8 +974,6 @@ class RosClientPygameGUI:
             
             cmd_str = f"{topic}: {message_json}"
             self.app_state['command_history'].append(cmd_str)
-            if len(self.app_state['command_history']) > 50:
-                self.app_state['command_history'].pop(0)
             
             self.add_log(f"Command sent to {topic}")
         except json.JSONDecodeError:
@@ -1200,6 +1234,7 @@ class RosClientPygameGUI:
     def handle_events(self):
         """Handle all pygame events."""
         for event in pygame.event.get():
+            self._last_input_time = time.time()
             if event.type == pygame.QUIT:
                 self.running = False
             
@@ -1258,7 +1293,13 @@ class RosClientPygameGUI:
         # Update app state before drawing
         self.app_state['drones'] = self.drones
         self.app_state['current_drone_id'] = self.current_drone_id
-        self.app_state['current_image'] = self.current_image
+        
+        # Publish a new frame to the tabs only when a worker produced one
+        if self.image_dirty.is_set():
+            self.image_dirty.clear()
+            with self.image_cache_lock:
+                self.app_state['current_image'] = self.current_image
+                self._displayed_image = self.current_image
         
         # Draw current tab
         if 0 <= self.current_tab < len(self.tab_instances):
@@ -1301,6 +1342,25 @@ class RosClientPygameGUI:
                                      size='label',
                                      color=DesignSystem.COLORS['text'])
     
+    def is_idle(self) -> bool:
+        """Check whether nothing changed since the last frame (no recent input, no new data)."""
+        if time.time() - self._last_input_time < self.idle_after:
+            return False
+        if self.image_dirty.is_set():
+            return False
+        
+        frame_data = (
+            self.app_state.get('status_data'),
+            self.app_state.get('pc_surface_simple'),
+            self.app_state.get('pc_surface_o3d'),
+        )
+        if len(frame_data) != len(self._last_frame_data) or any(
+            new is not old for new, old in zip(frame_data, self._last_frame_data)
+        ):
+            self._last_frame_data = frame_data
+            return False
+        return True
+    
     def run(self):
         """Main game loop."""
         if 'connection_logs' not in self.app_state:
@@ -1308,6 +1368,11 @@ class RosClientPygameGUI:
         self.add_log("Waiting for connection...")
         
         while self.running:
+            if self.is_idle():
+                # Sleep until input arrives or the idle frame interval elapses
+                event = pygame.event.wait(self.idle_frame_ms)
+                if event.type != pygame.NOEVENT:
+                    pygame.event.post(event)
             self.handle_events()
             self.update()
             self.draw()
@@ -99,18 +99,11 @@ class PointCloudRenderer:
     def _voxel_downsample(self, points, voxel_size: float):
         """Simple voxel grid downsampling."""
         # Calculate voxel indices
-        voxel_indices = np.floor(points / voxel_size).astype(np.int32)
+        voxel_indices = np.floor(points[:, :3] / voxel_size).astype(np.int32)
         
-        # Use dictionary to keep first point in each voxel
-        voxel_dict = {}
-        for i, idx in enumerate(voxel_indices):
-            idx_tuple = tuple(idx)
-            if idx_tuple not in voxel_dict:
-                voxel_dict[idx_tuple] = i
-        
-        # Return downsampled points
-        indices = list(voxel_dict.values())
-        return points[indices]
+        # Keep first point in each voxel (np.unique returns first-occurrence indices)
+        _, first_indices = np.unique(voxel_indices, axis=0, return_index=True)
+        return points[np.sort(first_indices)]
     
     def adaptive_sample(self, points):
         """Adaptive sampling based on point count and zoom level."""
@@ -131,30 +124,26 @@ class PointCloudRenderer:
             step = len(points) // effective_max
             return points[::step]
         
-        # Spatial binning
-        min_coords = np.min(points, axis=0)
-        max_coords = np.max(points, axis=0)
+        # Spatial binning: assign every point a flat bin id in one pass
+        xyz = points[:, :3]
+        min_coords = np.min(xyz, axis=0)
+        max_coords = np.max(xyz, axis=0)
         bin_size = (max_coords - min_coords) / num_bins
+        bin_size[bin_size == 0] = 1.0
         
-        sampled_indices = []
         points_per_bin = effective_max // num_bins
         
-        for i in range(num_bins):
-            for j in range(num_bins):
-                for k in range(num_bins):
-                    bin_min = min_coords + np.array([i, j, k]) * bin_size
-                    bin_max = bin_min + bin_size
-                    
-                    mask = np.all((points >= bin_min) & (points < bin_max), axis=1)
-                    bin_points = np.where(mask)[0]
-                    
-                    if len(bin_points) > 0:
-                        if len(bin_points) <= points_per_bin:
-                            sampled_indices.extend(bin_points)
-                        else:
-                            # Random sample from bin
-                            selected = np.random.choice(bin_points, points_per_bin, replace=False)
-                            sampled_indices.extend(selected)
+        bins = np.clip(((xyz - min_coords) / bin_size).astype(np.int64), 0, num_bins - 1)
+        bin_ids = (bins[:, 0] * num_bins + bins[:, 1]) * num_bins + bins[:, 2]
+        
+        # Random order within each bin, then keep the first points_per_bin of every bin
+        order = np.random.permutation(len(points))
+        order = order[np.argsort(bin_ids[order], kind='stable')]
+        sorted_ids = bin_ids[order]
+        bin_starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        bin_lengths = np.diff(np.r_[bin_starts, len(sorted_ids)])
+        rank_in_bin = np.arange(len(sorted_ids)) - np.repeat(bin_starts, bin_lengths)
+        sampled_indices = order[rank_in_bin < points_per_bin]
         
         if len(sampled_indices) == 0:
             # Fallback to uniform sampling
@@ -181,28 +170,22 @@ class PointCloudRenderer:
             z_min, z_max = np.min(z_coords), np.max(z_coords)
             if z_max > z_min:
                 height_normalized = (z_coords - z_min) / (z_max - z_min)
-                # Use color manager for smooth blending
-                for i, h_norm in enumerate(height_normalized):
-                    blended = self.renderer.blend_colors(
-                        DesignSystem.COLORS['primary_dark'],
-                        DesignSystem.COLORS['primary_light'],
-                        h_norm
-                    )
-                    colors[i] = blended
+                colors[:] = self._blend_gradient(height_normalized)
             else:
                 colors[:] = primary_color
         else:
             # Depth-based coloring with smooth gradient
-            for i, z_norm in enumerate(z_normalized):
-                blended = self.renderer.blend_colors(
-                    DesignSystem.COLORS['primary_dark'],
-                    DesignSystem.COLORS['primary_light'],
-                    z_norm
-                )
-                colors[i] = blended
+            colors[:] = self._blend_gradient(z_normalized)
         
         return colors
     
+    def _blend_gradient(self, factors):
+        """Vectorized ColorManager.blend between primary_dark and primary_light."""
+        dark = np.asarray(DesignSystem.COLORS['primary_dark'][:3], dtype=np.float64)
+        light = np.asarray(DesignSystem.COLORS['primary_light'][:3], dtype=np.float64)
+        f = np.clip(np.asarray(factors, dtype=np.float64), 0.0, 1.0)[:, None]
+        return (dark * (1 - f) + light * f).astype(np.uint8)
+    
     def render(self, points) -> Optional[pygame.Surface]:
         """Render point cloud to pygame surface with optimizations and caching."""
         start_time = time.time()
@@ -323,7 +306,7 @@ class PointCloudRenderer:
             colors = self.compute_colors(filtered_points, z_final, max_dist)
             
             # Vectorized point drawing using pixel array with optimized access
-            # Note: pygame.surfarray.pixels3d uses [y, x] indexing
+            # Note: pygame.surfarray.pixels3d uses [x, y] indexing
             pixel_array = pygame.surfarray.pixels3d(surface)
             
             # Draw points (vectorized for better performance)
@@ -336,31 +319,20 @@ class PointCloudRenderer:
                         min_len = min(len(proj_x), len(proj_y), len(colors))
                         if min_len > 0:
                             # Direct assignment - fastest for single pixel points
-                            pixel_array[proj_y[:min_len], proj_x[:min_len]] = colors[:min_len]
+                            pixel_array[proj_x[:min_len], proj_y[:min_len]] = colors[:min_len]
                     else:
-                        # Multi-pixel points with optimized batch drawing
-                        # Limit processing for performance
-                        max_points_to_draw = min(5000, len(proj_x))
+                        # Multi-pixel points: one vectorized assignment per kernel offset
+                        min_len = min(len(proj_x), len(proj_y), len(colors))
                         half_size = self.point_size // 2
+                        px = proj_x[:min_len]
+                        py = proj_y[:min_len]
+                        point_colors = colors[:min_len]
                         
-                        # Process in batches for better performance
-                        batch_size = 100
-                        for batch_start in range(0, max_points_to_draw, batch_size):
-                            batch_end = min(batch_start + batch_size, max_points_to_draw)
-                            batch_x = proj_x[batch_start:batch_end]
-                            batch_y = proj_y[batch_start:batch_end]
-                            batch_colors = colors[batch_start:batch_end]
-                            
-                            for i, (px, py, color) in enumerate(zip(batch_x, batch_y, batch_colors)):
-                                px, py = int(px), int(py)
-                                # Draw square of pixels with bounds checking
-                                y_min = max(0, py - half_size)
-                                y_max = min(self.height, py + half_size + 1)
-                                x_min = max(0, px - half_size)
-                                x_max = min(self.width, px + half_size + 1)
-                                
-                                if y_max > y_min and x_max > x_min:
-                                    pixel_array[y_min:y_max, x_min:x_max] = color
+                        for dy in range(-half_size, half_size + 1):
+                            ys = np.clip(py + dy, 0, self.height - 1)
+                            for dx in range(-half_size, half_size + 1):
+                                xs = np.clip(px + dx, 0, self.width - 1)
+                                pixel_array[xs, ys] = point_colors
                 except (IndexError, ValueError, MemoryError) as e:
                     # Fallback: draw points one by one if vectorized method fails
                     print(f"Vectorized drawing failed, using fallback: {e}")
@@ -369,7 +341,7 @@ class PointCloudRenderer:
                         px, py = int(proj_x[i]), int(proj_y[i])
                         if 0 <= px < self.width and 0 <= py < self.height:
                             try:
-                                pixel_array[py, px] = colors[i]
+                                pixel_array[px, py] = colors[i]
                             except (IndexError, ValueError):
                                 continue
             
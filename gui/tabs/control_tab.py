@@ -133,7 +133,7 @@ class ControlTab(BaseTab):
         command_history = app_state.get('command_history', [])
         if command_history:
             history_y = history_area.y + DesignSystem.SPACING['sm']
-            for cmd in command_history[-15:]:
+            for cmd in command_history:
                 cmd_height = self.renderer.measure_text(cmd, 'console')[1]
                 if history_y + cmd_height > history_area.bottom - DesignSystem.SPACING['sm']:
                     break
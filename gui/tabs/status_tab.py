@@ -22,6 +22,25 @@ except ImportError:
     HAS_POINTCLOUD = False
 
 
+# (label, status_data key) for each status card, in display order
+STATUS_FIELDS = (
+    ("Connection", "connected"),
+    ("Armed", "armed"),
+    ("Mode", "mode"),
+    ("Battery", "battery"),
+    ("Latitude", "latitude"),
+    ("Longitude", "longitude"),
+    ("Altitude", "altitude"),
+    ("Roll", "roll"),
+    ("Pitch", "pitch"),
+    ("Yaw", "yaw"),
+    ("Landed", "landed"),
+    ("Reached", "reached"),
+    ("Returned", "returned"),
+    ("Tookoff", "tookoff"),
+)
+
+
 class StatusTab(BaseTab):
     """Status monitoring tab with camera and point cloud."""
     
@@ -38,6 +57,7 @@ class StatusTab(BaseTab):
         super().__init__(screen, screen_width, screen_height)
         self.components = components
         self.renderer = get_renderer()
+        self._default_status = ("N/A", DesignSystem.COLORS['text_tertiary'])
         
     def draw(self, app_state: Dict[str, Any]):
         """Draw status tab."""
@@ -65,23 +85,6 @@ class StatusTab(BaseTab):
         y += 50
         
         # Status fields
-        status_fields_data = [
-            ("Connection", "connected"),
-            ("Armed", "armed"),
-            ("Mode", "mode"),
-            ("Battery", "battery"),
-            ("Latitude", "latitude"),
-            ("Longitude", "longitude"),
-            ("Altitude", "altitude"),
-            ("Roll", "roll"),
-            ("Pitch", "pitch"),
-            ("Yaw", "yaw"),
-            ("Landed", "landed"),
-            ("Reached", "reached"),
-            ("Returned", "returned"),
-            ("Tookoff", "tookoff"),
-        ]
-        
         x_start = 50
         x_offset = (self.screen_width - 100) // 2
         card_width = x_offset - DesignSystem.SPACING['md']
@@ -91,22 +94,22 @@ class StatusTab(BaseTab):
         status_fields = self.components.get('status_fields', {})
         status_data = app_state.get('status_data', {})
         
-        for i, (label, field_key) in enumerate(status_fields_data):
-            x = x_start if i % 2 == 0 else x_start + x_offset
-            row = i // 2
-            card_y = status_y + row * (card_height + DesignSystem.SPACING['sm'])
-            
-            if field_key not in status_fields:
-                value, color = self._get_status_value(field_key, status_data)
-                status_fields[field_key] = Field(x, card_y, card_width, card_height, label, value, color)
+        default_status = self._default_status
+        for i, (label, field_key) in enumerate(STATUS_FIELDS):
+            value, color = status_data.get(field_key, default_status)
+            field = status_fields.get(field_key)
+            if field is None:
+                x = x_start if i % 2 == 0 else x_start + x_offset
+                card_y = status_y + (i // 2) * (card_height + DesignSystem.SPACING['sm'])
+                field = Field(x, card_y, card_width, card_height, label, value, color)
+                status_fields[field_key] = field
             else:
-                value, color = self._get_status_value(field_key, status_data)
-                status_fields[field_key].set_value(value, color)
+                field.set_value(value, color)
             
-            status_fields[field_key].draw(self.screen)
+            field.draw(self.screen)
         
         # Calculate bottom of status fields
-        status_bottom = status_y + ((len(status_fields_data) + 1) // 2) * (card_height + DesignSystem.SPACING['sm'])
+        status_bottom = status_y + ((len(STATUS_FIELDS) + 1) // 2) * (card_height + DesignSystem.SPACING['sm'])
         y = status_bottom + DesignSystem.SPACING['xl']
         
         # Camera and Point Cloud display (side by side)
@@ -164,25 +167,7 @@ class StatusTab(BaseTab):
     
     def _get_status_value(self, field_key: str, status_data: Dict[str, Any]):
         """Get status value and color for a field."""
-        if field_key in status_data:
-            return status_data[field_key]
-        defaults = {
-            "connected": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "armed": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "mode": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "battery": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "latitude": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "longitude": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "altitude": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "roll": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "pitch": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "yaw": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "landed": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "reached": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "returned": ("N/A", DesignSystem.COLORS['text_tertiary']),
-            "tookoff": ("N/A", DesignSystem.COLORS['text_tertiary']),
-        }
-        return defaults.get(field_key, ("N/A", DesignSystem.COLORS['text_tertiary']))
+        return status_data.get(field_key, self._default_status)
     
     def handle_event(self, event: pygame.event.Event, app_state: Dict[str, Any]) -> bool:
         """Handle status tab events."""
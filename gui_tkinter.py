@@ -5,7 +5,7 @@ from tkinter import ttk, scrolledtext, messagebox
 import threading
 import json
 import time
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, Callable
 import queue
 
 try:
@@ -64,6 +64,11 @@ class RosClientGUITest:
         self._last_canvas_size: Dict[str, Tuple[int, int]] = {}  # Track canvas size changes
         self._pending_image_update: Dict[str, bool] = {"main": False, "control": False}  # Separate flags for each canvas
         
+        # Short-lived read cache: coalesces auto-refresh and button-triggered reads of the same data
+        self._read_cache: Dict[str, Tuple[float, Any]] = {}
+        self._read_cache_ttl = 0.25
+        self._last_recording_stats: Optional[Dict[str, Any]] = None
+        
         self.setup_ui()
         self.setup_update_loop()
         
@@ -872,6 +877,22 @@ class RosClientGUITest:
         self.image_update_thread = threading.Thread(target=image_update_loop, daemon=True)
         self.image_update_thread.start()
         
+    def _cached_read(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Return a recent client read for key, calling fetch only when the cached value is stale.
+        
+        Args:
+            key: Cache key for the read (e.g. "status")
+            fetch: Callable performing the actual client read
+        """
+        now = time.monotonic()
+        cached = self._read_cache.get(key)
+        if cached is not None and now - cached[0] < self._read_cache_ttl:
+            return cached[1]
+        value = fetch()
+        self._read_cache[key] = (now, value)
+        return value
+        
     def log(self, message: str, level: str = "info"):
         """Log message to connection status with color coding."""
         timestamp = time.strftime("%H:%M:%S")
@@ -1186,6 +1207,10 @@ class RosClientGUITest:
             for label in self.status_labels.values():
                 label.config(text="N/A", foreground="#6c757d")
             
+            # Drop cached reads from the old client
+            self._read_cache.clear()
+            self._last_recording_stats = None
+            
             # Clear image display state
             self._last_canvas_size.clear()
             self._pending_image_update = {"main": False, "control": False}
@@ -1202,9 +1227,11 @@ class RosClientGUITest:
             if not self.client.is_connected():
                 return
                 
-            state = self.client.get_status()
-            pos = self.client.get_position()
-            ori = self.client.get_orientation()
+            client = self.client
+            state, pos, ori = self._cached_read(
+                "status",
+                lambda: (client.get_status(), client.get_position(), client.get_orientation())
+            )
             
             status_data = {
                 "connected": ("Connected", "#28a745") if state.connected else ("Disconnected", "#dc3545"),
@@ -1751,8 +1778,9 @@ class RosClientGUITest:
             return
         
         try:
-            stats = self.client.get_recording_statistics()
-            if stats:
+            stats = self._cached_read("recording_stats", self.client.get_recording_statistics)
+            if stats and stats != self._last_recording_stats:
+                self._last_recording_stats = stats
                 self.recording_stats.config(state=tk.NORMAL)
                 self.recording_stats.delete('1.0', tk.END)
                 
@@ -1870,8 +1898,11 @@ class RosClientGUITest:
         """Update playback information display."""
         try:
             if self.client and isinstance(self.client, MockRosClient) and self.client.is_playback_mode():
-                progress = self.client.playback_get_progress()
-                current_time = self.client.playback_get_current_time()
+                client = self.client
+                progress, current_time = self._cached_read(
+                    "playback_info",
+                    lambda: (client.playback_get_progress(), client.playback_get_current_time())
+                )
                 
                 self.playback_progress_label.config(text=f"{progress*100:.1f}%")
                 self.playback_time_label.config(text=f"{current_time:.1f}s")
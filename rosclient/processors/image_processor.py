@@ -1,7 +1,7 @@
 """Intelligent image processing module for ROS camera messages."""
 from __future__ import annotations
 
-import base64
+import binascii
 import logging
 import time
 from abc import ABC, abstractmethod
@@ -11,6 +11,32 @@ from typing import Optional, Tuple, Dict, Any, List, Callable
 import cv2
 import numpy as np
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    HAS_TURBOJPEG = True
+except ImportError:
+    HAS_TURBOJPEG = False
+    TurboJPEG = None
+    TJPF_BGR = None
+
+# JPEG start-of-image marker
+JPEG_MAGIC = b"\xff\xd8"
+
+
+def _message_buffer(data: Any) -> Optional[Any]:
+    """
+    Return the payload of a message ``data`` field as a bytes-like object.
+    
+    Base64 strings (rosbridge JSON encoding) are decoded with binascii directly
+    from the str buffer; bytes-like payloads are returned as-is instead of being
+    copied, which matters for multi-megabyte raw frames.
+    """
+    if isinstance(data, str):
+        return binascii.a2b_base64(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    return None
+
 
 class ImageFormat(Enum):
     """Supported image output formats."""
@@ -47,6 +73,13 @@ class CompressedImageDecoder(ImageDecoder):
     
     def __init__(self, logger: Optional[logging.Logger] = None):
         self.log = logger or logging.getLogger(self.__class__.__name__)
+        # libjpeg-turbo decodes JPEG straight to a BGR array, bypassing cv2's generic codec path
+        self._tjpeg = None
+        if HAS_TURBOJPEG:
+            try:
+                self._tjpeg = TurboJPEG()
+            except Exception as e:
+                self.log.debug(f"TurboJPEG unavailable, using OpenCV: {e}")
     
     def can_decode(self, msg: dict) -> bool:
         """Check for CompressedImage format."""
@@ -59,14 +92,18 @@ class CompressedImageDecoder(ImageDecoder):
             if not data:
                 return None
             
-            # Handle base64 string
-            if isinstance(data, str):
-                img_data = base64.b64decode(data)
-            elif isinstance(data, (bytes, bytearray)):
-                img_data = bytes(data)
-            else:
+            # Handle base64 string or raw bytes
+            img_data = _message_buffer(data)
+            if img_data is None:
                 return None
             
+            # Fast path for JPEG via libjpeg-turbo
+            if self._tjpeg is not None and img_data[:2] == JPEG_MAGIC:
+                try:
+                    return self._tjpeg.decode(img_data, pixel_format=TJPF_BGR)
+                except Exception as e:
+                    self.log.debug(f"TurboJPEG decode failed, falling back to OpenCV: {e}")
+            
             # Decode with OpenCV
             np_arr = np.frombuffer(img_data, dtype=np.uint8)
             frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
@@ -118,11 +155,8 @@ class RawImageDecoder(ImageDecoder):
                 dtype = np.uint8
             
             # Handle different data types
-            if isinstance(data, str):
-                img_data = base64.b64decode(data)
-            elif isinstance(data, (bytes, bytearray)):
-                img_data = bytes(data)
-            else:
+            img_data = _message_buffer(data)
+            if img_data is None:
                 return None
             
             np_arr = np.frombuffer(img_data, dtype=dtype)
@@ -172,7 +206,7 @@ class LegacyDecoder(ImageDecoder):
                 if frame is not None:
                     return frame
             elif isinstance(data, str):
-                img_data = base64.b64decode(data)
+                img_data = binascii.a2b_base64(data)
                 np_arr = np.frombuffer(img_data, dtype=np.uint8)
                 frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
                 if frame is not None:
@@ -4,9 +4,20 @@ CLI 模块
 UAV Commander 命令行接口。
 """
 
+import importlib
+
 from .main import main
-from .repl import REPL, SimpleREPL, REPLConfig, REPLState
-from .commands import CommandHandler, Command, CommandResult
+
+# 导出名 -> 所在子模块（按需加载，CLI 入口无需提前加载 REPL/Agent）
+_EXPORTS = {
+    "REPL": ".repl",
+    "SimpleREPL": ".repl",
+    "REPLConfig": ".repl",
+    "REPLState": ".repl",
+    "CommandHandler": ".commands",
+    "Command": ".commands",
+    "CommandResult": ".commands",
+}
 
 
 __all__ = [
@@ -20,3 +31,10 @@ __all__ = [
     "CommandResult",
 ]
 
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
+
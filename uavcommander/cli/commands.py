@@ -4,22 +4,32 @@
 定义 CLI 内置命令。
 """
 
-from typing import Optional, Dict, List, Any, Callable, TYPE_CHECKING
+from typing import Optional, Dict, List, Any, Callable, Hashable, Tuple, TypeVar, TYPE_CHECKING
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
+import io
+import os
+import sys
 
-from core.config import get_config
-from core.tools import get_tool_registry
-from core.agent import get_agent_registry
+from core.config import ApprovalMode
 
 if TYPE_CHECKING:
     from .repl import REPL
 
+T = TypeVar("T")
 
-@dataclass
+
+# ANSI 清屏序列
+CLEAR_SCREEN = "\x1b[H\x1b[2J\x1b[3J"
+
+# 模式名 -> 审批模式
+_MODE_MAP: Dict[str, ApprovalMode] = {mode.value: mode for mode in ApprovalMode}
+
+
+@dataclass(frozen=True, slots=True)
 class CommandResult:
-    """命令执行结果"""
+    """命令执行结果（不可变，可安全复用同一实例）"""
     
     success: bool
     output: Optional[str] = None
@@ -29,11 +39,34 @@ class CommandResult:
 class Command:
     """命令基类"""
     
+    __slots__ = ("handler", "_output_cache")
+    
     name: str = ""
     aliases: List[str] = []
     description: str = ""
     usage: str = ""
     
+    # 渲染缓存的最大条目数（超出时整体清空）
+    OUTPUT_CACHE_SIZE = 32
+    
+    def __init__(self, handler: Optional["CommandHandler"] = None):
+        self.handler = handler  # 未指定时在 CommandHandler.register() 中绑定
+        self._output_cache: Dict[Tuple[Hashable, ...], Any] = {}
+    
+    def _cached_output(self, key: Tuple[Hashable, ...], build: Callable[[], T]) -> T:
+        """
+        按 key 缓存渲染结果（输出文本或预构建的 CommandResult）
+        
+        key 中需包含输出所依赖的注册表版本号，版本变化后自然失效。
+        """
+        output = self._output_cache.get(key)
+        if output is None:
+            if len(self._output_cache) >= self.OUTPUT_CACHE_SIZE:
+                self._output_cache.clear()
+            output = build()
+            self._output_cache[key] = output
+        return output
+    
     async def execute(
         self,
         args: List[str],
@@ -46,59 +79,73 @@ class Command:
 class HelpCommand(Command):
     """帮助命令"""
     
+    __slots__ = ()
+    
     name = "help"
     aliases = ["h", "?"]
     description = "显示帮助信息"
     usage = "help [command]"
     
-    def __init__(self, handler: "CommandHandler"):
-        self.handler = handler
-    
     async def execute(
         self,
         args: List[str],
         repl: Optional["REPL"] = None,
     ) -> CommandResult:
+        cmd = None
         if args:
             # 显示特定命令帮助
             cmd_name = args[0]
             cmd = self.handler.get_command(cmd_name)
-            if cmd:
-                output = f"""
+            if not cmd:
+                return CommandResult(False, f"未知命令: {cmd_name}")
+        
+        # 预构建的帮助结果按命令集版本缓存（None 表示全部命令），命中时复用同一实例
+        return self._cached_output(
+            (self.handler.version, cmd.name if cmd else None),
+            lambda: CommandResult(
+                True, self._render_command(cmd) if cmd else self._render_all()
+            ),
+        )
+    
+    @staticmethod
+    def _render_command(cmd: Command) -> str:
+        """渲染单个命令的帮助"""
+        output = f"""
 命令: {cmd.name}
 别名: {', '.join(cmd.aliases) if cmd.aliases else '无'}
 描述: {cmd.description}
 用法: {cmd.usage}
 """
-                return CommandResult(True, output.strip())
-            else:
-                return CommandResult(False, f"未知命令: {cmd_name}")
-        
-        # 显示所有命令
-        lines = ["可用命令:", ""]
+        return output.strip()
+    
+    def _render_all(self) -> str:
+        """渲染所有命令的帮助"""
+        buf = io.StringIO()
+        w = buf.write
+        w("可用命令:\n\n")
         
         for cmd in self.handler.list_commands():
             aliases = f" ({', '.join(cmd.aliases)})" if cmd.aliases else ""
-            lines.append(f"  {cmd.name}{aliases}")
-            lines.append(f"    {cmd.description}")
-            lines.append("")
+            w(f"  {cmd.name}{aliases}\n    {cmd.description}\n\n")
         
-        lines.extend([
-            "自然语言命令:",
-            "  直接输入自然语言指令，例如:",
-            "    - 让3架无人机起飞",
-            "    - 建立V形编队飞往A点",
-            "    - 查看所有无人机状态",
-            "",
-            "输入 'help <command>' 查看命令详情",
-        ])
+        w(
+            "自然语言命令:\n"
+            "  直接输入自然语言指令，例如:\n"
+            "    - 让3架无人机起飞\n"
+            "    - 建立V形编队飞往A点\n"
+            "    - 查看所有无人机状态\n"
+            "\n"
+            "输入 'help <command>' 查看命令详情"
+        )
         
-        return CommandResult(True, "\n".join(lines))
+        return buf.getvalue()
 
 
 class ExitCommand(Command):
     """退出命令"""
     
+    __slots__ = ()
+    
     name = "exit"
     aliases = ["quit", "q"]
     description = "退出程序"
@@ -117,6 +164,8 @@ class ExitCommand(Command):
 class StatusCommand(Command):
     """状态命令"""
     
+    __slots__ = ()
+    
     name = "status"
     aliases = ["st"]
     description = "显示系统状态"
@@ -127,40 +176,51 @@ class StatusCommand(Command):
         args: List[str],
         repl: Optional["REPL"] = None,
     ) -> CommandResult:
-        config = get_config()
+        config = self.handler.config
+        registry = self.handler.tool_registry
+        agent_registry = self.handler.agent_registry
         
-        lines = [
-            "系统状态:",
-            f"  模型: {config.get_model()}",
-            f"  审批模式: {config.get_approval_mode().value}",
-            f"  仿真模式: {config.is_simulation()}",
-            "",
-        ]
+        key = (config.get_version(), registry.version, agent_registry.version)
+        return CommandResult(True, self._cached_output(
+            key,
+            lambda: self._render(config, registry, agent_registry),
+        ))
+    
+    @staticmethod
+    def _render(config, registry, agent_registry) -> str:
+        """渲染系统状态"""
+        buf = io.StringIO()
+        w = buf.write
+        w(
+            "系统状态:\n"
+            f"  模型: {config.get_model()}\n"
+            f"  审批模式: {config.get_approval_mode().value}\n"
+            f"  仿真模式: {config.is_simulation()}\n"
+            "\n"
+        )
         
         # 工具状态
-        registry = get_tool_registry()
         tools = registry.list_tools()
-        lines.append(f"已注册工具: {len(tools)}")
+        w(f"已注册工具: {len(tools)}")
         for tool in tools:
-            lines.append(f"  - {tool.name}: {tool.description[:40]}...")
+            w(f"\n  - {tool.name}: {registry.get_short_description(tool.name)}...")
         
-        lines.append("")
+        w("\n\n")
         
         # Agent 状态
-        agent_registry = get_agent_registry()
         agents = agent_registry.list_agents()
-        lines.append(f"已注册代理: {len(agents)}")
+        w(f"已注册代理: {len(agents)}")
         for name in agents:
-            agent = agent_registry.get(name)
-            if agent:
-                lines.append(f"  - {name}: {agent.description[:40]}...")
+            w(f"\n  - {name}: {agent_registry.get_short_description(name)}...")
         
-        return CommandResult(True, "\n".join(lines))
+        return buf.getvalue()
 
 
 class ToolsCommand(Command):
     """工具列表命令"""
     
+    __slots__ = ()
+    
     name = "tools"
     aliases = ["t"]
     description = "列出所有可用工具"
@@ -171,7 +231,7 @@ class ToolsCommand(Command):
         args: List[str],
         repl: Optional["REPL"] = None,
     ) -> CommandResult:
-        registry = get_tool_registry()
+        registry = self.handler.tool_registry
         
         if args:
             # 显示特定工具详情
@@ -180,42 +240,63 @@ class ToolsCommand(Command):
             if not tool:
                 return CommandResult(False, f"未找到工具: {tool_name}")
             
-            lines = [
-                f"工具: {tool.name}",
-                f"描述: {tool.description}",
-                f"类别: {tool.category.value}",
-                "",
-                "方法:",
-            ]
-            
-            for method in tool.get_methods():
-                dangerous = " ⚠️" if method.dangerous else ""
-                lines.append(f"  - {method.name}{dangerous}")
-                lines.append(f"    {method.description}")
-                if method.required:
-                    lines.append(f"    必需参数: {', '.join(method.required)}")
-            
-            return CommandResult(True, "\n".join(lines))
+            return CommandResult(True, self._cached_output(
+                (registry.version, tool_name),
+                lambda: self._render_tool(tool),
+            ))
         
         # 列出所有工具
-        tools = registry.list_tools()
-        
-        if not tools:
+        if not registry.list_tools():
             return CommandResult(True, "没有已注册的工具")
         
-        lines = ["可用工具:", ""]
-        for tool in tools:
-            lines.append(f"  {tool.name}")
-            lines.append(f"    {tool.description}")
-            lines.append(f"    方法: {', '.join(m.name for m in tool.get_methods())}")
-            lines.append("")
+        return CommandResult(True, self._cached_output(
+            (registry.version,),
+            lambda: self._render_all(registry),
+        ))
+    
+    @staticmethod
+    def _render_tool(tool) -> str:
+        """渲染单个工具详情"""
+        buf = io.StringIO()
+        w = buf.write
+        w(
+            f"工具: {tool.name}\n"
+            f"描述: {tool.description}\n"
+            f"类别: {tool.category.value}\n"
+            "\n"
+            "方法:"
+        )
+        
+        for method in tool.get_methods():
+            dangerous = " ⚠️" if method.dangerous else ""
+            w(f"\n  - {method.name}{dangerous}\n    {method.description}")
+            if method.required:
+                w(f"\n    必需参数: {', '.join(method.required)}")
         
-        return CommandResult(True, "\n".join(lines))
+        return buf.getvalue()
+    
+    @staticmethod
+    def _render_all(registry) -> str:
+        """渲染工具列表"""
+        buf = io.StringIO()
+        w = buf.write
+        w("可用工具:\n")
+        for tool in registry.list_tools():
+            w(
+                f"\n  {tool.name}"
+                f"\n    {tool.description}"
+                f"\n    方法: {', '.join(m.name for m in tool.get_methods())}"
+                "\n"
+            )
+        
+        return buf.getvalue()
 
 
 class AgentsCommand(Command):
     """代理列表命令"""
     
+    __slots__ = ()
+    
     name = "agents"
     aliases = ["a"]
     description = "列出所有可用代理"
@@ -226,7 +307,7 @@ class AgentsCommand(Command):
         args: List[str],
         repl: Optional["REPL"] = None,
     ) -> CommandResult:
-        registry = get_agent_registry()
+        registry = self.handler.agent_registry
         
         if args:
             # 显示特定代理详情
@@ -235,36 +316,50 @@ class AgentsCommand(Command):
             if not agent:
                 return CommandResult(False, f"未找到代理: {agent_name}")
             
-            lines = [
-                f"代理: {agent.name}",
-                f"描述: {agent.description}",
-                f"类型: {agent.agent_type.value}",
-                f"工具: {', '.join(agent.tools) if agent.tools else '无'}",
-                f"能力: {', '.join(c.value for c in agent.capabilities) if agent.capabilities else '无'}",
-            ]
-            
-            return CommandResult(True, "\n".join(lines))
+            return CommandResult(True, self._cached_output(
+                (registry.version, agent_name),
+                lambda: self._render_agent(agent),
+            ))
         
         # 列出所有代理
-        agents = registry.list_agents()
-        
-        if not agents:
+        if not registry.list_agents():
             return CommandResult(True, "没有已注册的代理")
         
-        lines = ["可用代理:", ""]
-        for name in agents:
+        return CommandResult(True, self._cached_output(
+            (registry.version,),
+            lambda: self._render_all(registry),
+        ))
+    
+    @staticmethod
+    def _render_agent(agent) -> str:
+        """渲染单个代理详情"""
+        return (
+            f"代理: {agent.name}\n"
+            f"描述: {agent.description}\n"
+            f"类型: {agent.agent_type.value}\n"
+            f"工具: {', '.join(agent.tools) if agent.tools else '无'}\n"
+            f"能力: {', '.join(c.value for c in agent.capabilities) if agent.capabilities else '无'}"
+        )
+    
+    @staticmethod
+    def _render_all(registry) -> str:
+        """渲染代理列表"""
+        buf = io.StringIO()
+        w = buf.write
+        w("可用代理:\n")
+        for name in registry.list_agents():
             agent = registry.get(name)
             if agent:
-                lines.append(f"  {name} ({agent.agent_type.value})")
-                lines.append(f"    {agent.description}")
-                lines.append("")
+                w(f"\n  {name} ({agent.agent_type.value})\n    {agent.description}\n")
         
-        return CommandResult(True, "\n".join(lines))
+        return buf.getvalue()
 
 
 class ClearCommand(Command):
     """清屏命令"""
     
+    __slots__ = ()
+    
     name = "clear"
     aliases = ["cls"]
     description = "清除屏幕"
@@ -275,14 +370,20 @@ class ClearCommand(Command):
         args: List[str],
         repl: Optional["REPL"] = None,
     ) -> CommandResult:
-        import os
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if os.name == 'nt':
+            os.system('cls')
+        else:
+            # 直接输出清屏序列（与 clear 相同：清屏、清滚动缓冲、光标归位），避免启动子进程
+            sys.stdout.write(CLEAR_SCREEN)
+            sys.stdout.flush()
         return CommandResult(True, None)
 
 
 class ModeCommand(Command):
     """模式切换命令"""
     
+    __slots__ = ()
+    
     name = "mode"
     aliases = ["m"]
     description = "切换审批模式"
@@ -293,33 +394,47 @@ class ModeCommand(Command):
         args: List[str],
         repl: Optional["REPL"] = None,
     ) -> CommandResult:
-        from core.config import ApprovalMode, get_config
-        
-        config = get_config()
+        config = self.handler.config
         
         if not args:
             current = config.get_approval_mode()
             return CommandResult(True, f"当前审批模式: {current.value}")
         
         mode_str = args[0].lower()
-        try:
-            new_mode = ApprovalMode(mode_str)
-            config.system.approval_mode = new_mode
-            return CommandResult(True, f"审批模式已切换为: {new_mode.value}")
-        except ValueError:
+        new_mode = _MODE_MAP.get(mode_str)
+        if new_mode is None:
             return CommandResult(False, f"未知模式: {mode_str}，可选: strict/normal/yolo")
+        
+        config.set_approval_mode(new_mode)
+        return CommandResult(True, f"审批模式已切换为: {new_mode.value}")
 
 
 class CommandHandler:
     """命令处理器"""
     
     def __init__(self, repl: Optional["REPL"] = None):
+        from core.config import get_config
+        from core.tools import get_tool_registry
+        from core.agent import get_agent_registry
+        
         self.repl = repl
+        
+        # 命令执行时共用的全局对象，构造时解析一次
+        self.config = repl.config if repl else get_config()
+        self.tool_registry = get_tool_registry()
+        self.agent_registry = get_agent_registry()
+        
         self._commands: Dict[str, Command] = {}
-        self._alias_map: Dict[str, str] = {}
+        self._lookup: Dict[str, Command] = {}  # 名称与别名 -> 命令
+        self._version = 0  # 命令集变更计数，help 输出缓存据此失效
         
         self._register_default_commands()
     
+    @property
+    def version(self) -> int:
+        """命令集版本号（每次注册命令时递增）"""
+        return self._version
+    
     def _register_default_commands(self) -> None:
         """注册默认命令"""
         commands = [
@@ -337,21 +452,18 @@ class CommandHandler:
     
     def register(self, command: Command) -> None:
         """注册命令"""
+        if command.handler is None:
+            command.handler = self
         self._commands[command.name] = command
+        self._lookup[command.name] = command
         for alias in command.aliases:
-            self._alias_map[alias] = command.name
+            self._lookup[alias] = command
+        self._version += 1
     
     def get_command(self, name: str) -> Optional[Command]:
         """获取命令"""
-        # 移除前导斜杠
-        if name.startswith("/"):
-            name = name[1:]
-        
-        # 检查别名
-        if name in self._alias_map:
-            name = self._alias_map[name]
-        
-        return self._commands.get(name)
+        # 移除前导斜杠；名称与别名共用一张表，一次查找
+        return self._lookup.get(name[1:] if name.startswith("/") else name)
     
     def list_commands(self) -> List[Command]:
         """列出所有命令"""
@@ -363,12 +475,17 @@ class CommandHandler:
         if input_str.startswith("/"):
             input_str = input_str[1:]
         
-        parts = input_str.split()
-        if not parts:
-            return CommandResult(False, "空命令")
-        
-        cmd_name = parts[0].lower()
-        args = parts[1:]
+        if input_str and not any(c.isspace() for c in input_str):
+            # 无参数命令（最常见的情况）无需切分
+            cmd_name = input_str.lower()
+            args: List[str] = []
+        else:
+            parts = input_str.split()
+            if not parts:
+                return CommandResult(False, "空命令")
+            
+            cmd_name = parts[0].lower()
+            args = parts[1:]
         
         # 查找命令
         command = self.get_command(cmd_name)
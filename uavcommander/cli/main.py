@@ -7,7 +7,7 @@ UAV Commander 命令行接口入口。
 import asyncio
 import sys
 import argparse
-from typing import Optional
+from typing import Optional, List
 import logging
 
 from core.config import (
@@ -18,15 +18,22 @@ from core.config import (
     get_config,
     set_config,
 )
-from core.tools import setup_default_tools
 from utils import setup_logging, LogConfig, LogLevel
 
-from .repl import REPL
-from .commands import CommandHandler
 
+def _install_uvloop() -> None:
+    """可用时改用 uvloop 事件循环（Windows 不支持，缺失时使用默认循环）"""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
-def parse_args() -> argparse.Namespace:
-    """解析命令行参数"""
+
+def _build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
     parser = argparse.ArgumentParser(
         prog="uavcommander",
         description="UAV Commander - 基于 LLM 的智能无人机集群控制系统",
@@ -47,9 +54,10 @@ def parse_args() -> argparse.Namespace:
     
     parser.add_argument(
         "--approval-mode",
-        type=str,
-        choices=["strict", "normal", "yolo"],
-        default="normal",
+        type=ApprovalMode,
+        choices=list(ApprovalMode),
+        metavar="{strict,normal,yolo}",
+        default=ApprovalMode.NORMAL,
         help="审批模式: strict/normal/yolo (默认: normal)",
     )
     
@@ -77,7 +85,16 @@ def parse_args() -> argparse.Namespace:
         help="禁用流式输出",
     )
     
-    return parser.parse_args()
+    return parser
+
+
+# 解析器只在导入时构建一次
+_PARSER = _build_parser()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    return _PARSER.parse_args(argv)
 
 
 def setup_config(args: argparse.Namespace) -> Config:
@@ -90,14 +107,11 @@ def setup_config(args: argparse.Namespace) -> Config:
     else:
         environment = Environment.PRODUCTION
     
-    # 审批模式
-    approval_mode = ApprovalMode(args.approval_mode)
-    
     # 创建配置
     settings = SystemSettings(
         environment=environment,
         debug=args.debug,
-        approval_mode=approval_mode,
+        approval_mode=args.approval_mode,
         log_level="DEBUG" if args.debug else "INFO",
     )
     
@@ -149,6 +163,8 @@ async def run_single_command(command: str, config: Config) -> None:
 
 async def run_repl(config: Config, stream_enabled: bool = True) -> None:
     """运行交互式 REPL"""
+    from .repl import REPL
+    
     repl = REPL(config, stream_enabled=stream_enabled)
     await repl.run()
 
@@ -164,17 +180,24 @@ def main() -> None:
     config = setup_config(args)
     
     # 设置工具
+    from core.tools import setup_default_tools
     setup_default_tools()
     
-    # 显示启动信息
-    print("=" * 60)
-    print("  🚁 UAV Commander - 智能无人机集群控制系统")
-    print("=" * 60)
-    print(f"  模型: {config.get_model()}")
-    print(f"  审批模式: {config.get_approval_mode().value}")
-    print(f"  仿真模式: {config.is_simulation()}")
-    print("=" * 60)
-    print()
+    # 显示启动信息（一次写出）
+    rule = "=" * 60
+    sys.stdout.write(
+        f"{rule}\n"
+        "  🚁 UAV Commander - 智能无人机集群控制系统\n"
+        f"{rule}\n"
+        f"  模型: {config.get_model()}\n"
+        f"  审批模式: {config.get_approval_mode().value}\n"
+        f"  仿真模式: {config.is_simulation()}\n"
+        f"{rule}\n"
+        "\n"
+    )
+    sys.stdout.flush()
+    
+    _install_uvloop()
     
     try:
         if args.command:
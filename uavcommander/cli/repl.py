@@ -6,6 +6,7 @@
 
 import asyncio
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, List, Any, Callable
 from dataclasses import dataclass
 from enum import Enum
@@ -22,8 +23,38 @@ from core.schema import ToolConfirmationOutcome
 
 from .commands import CommandHandler, CommandResult
 
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory, InMemoryHistory
+    HAS_PROMPT_TOOLKIT = True
+except ImportError:
+    HAS_PROMPT_TOOLKIT = False
+    PromptSession = None
+
 logger = logging.getLogger(__name__)
 
+# 无需斜杠前缀即可识别的内置命令
+_BUILTIN_NAMES = frozenset({"help", "exit", "quit", "status"})
+
+# 流式输出缓冲：累计 token 数或等待时间达到阈值时写出
+STREAM_FLUSH_TOKENS = 16
+STREAM_FLUSH_DELAY = 0.05  # 秒
+
+# 确认输入 -> 确认结果
+_CONFIRM_MAP: Dict[str, ToolConfirmationOutcome] = {
+    "y": ToolConfirmationOutcome.PROCEED_ONCE,
+    "yes": ToolConfirmationOutcome.PROCEED_ONCE,
+    "确认": ToolConfirmationOutcome.PROCEED_ONCE,
+    "是": ToolConfirmationOutcome.PROCEED_ONCE,
+    "n": ToolConfirmationOutcome.CANCEL,
+    "no": ToolConfirmationOutcome.CANCEL,
+    "取消": ToolConfirmationOutcome.CANCEL,
+    "否": ToolConfirmationOutcome.CANCEL,
+    "a": ToolConfirmationOutcome.PROCEED_ALWAYS,
+    "always": ToolConfirmationOutcome.PROCEED_ALWAYS,
+    "总是": ToolConfirmationOutcome.PROCEED_ALWAYS,
+}
+
 
 class REPLState(Enum):
     """REPL 状态"""
@@ -34,7 +65,7 @@ class REPLState(Enum):
     EXITING = "exiting"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class REPLConfig:
     """REPL 配置"""
     
@@ -68,16 +99,34 @@ class REPL:
         self.state = REPLState.IDLE
         self._executor: Optional[AgentExecutor] = None
         self._command_handler = CommandHandler(self)
+        # 中断信号（执行器会 await wait()，必须是 asyncio.Event）；
+        # 其他线程通过 _call_in_loop 设置
         self._abort_signal = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
         # 待确认的工具调用
         self._pending_confirmations: Dict[str, Dict[str, Any]] = {}
+        
+        # 流式输出缓冲
+        self._stream_buffer: List[str] = []
+        self._stream_flush_handle: Optional[asyncio.TimerHandle] = None
+        
+        # 终端下优先使用 prompt_toolkit 在事件循环内直接读取输入（支持历史与行编辑）；
+        # 否则退回到阻塞式 input() 专用的单线程执行器
+        self._session = None
+        if HAS_PROMPT_TOOLKIT and sys.stdin.isatty():
+            history_file = self.repl_config.history_file
+            history = FileHistory(history_file) if history_file else InMemoryHistory()
+            self._session = PromptSession(history=history)
+        self._input_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="repl-input")
     
     async def run(self) -> None:
         """运行 REPL 主循环"""
         print(self.repl_config.welcome_message)
         print()
         
+        self._loop = asyncio.get_running_loop()
+        
         # 创建执行器
         factory = AgentExecutorFactory(self.config)
         self._executor = factory.create_coordinator()
@@ -89,6 +138,11 @@ class REPL:
         # 注册回调
         self._setup_callbacks()
         
+        if not sys.stdin.isatty():
+            # 管道/脚本输入：一次读入全部行依次处理，不显示提示符
+            await self._run_batch(sys.stdin.read().splitlines())
+            return
+        
         while self.state != REPLState.EXITING:
             try:
                 # 获取输入
@@ -115,6 +169,17 @@ class REPL:
                 logger.error(f"[REPL] 错误: {e}")
                 print(f"❌ 错误: {e}")
     
+    async def _run_batch(self, lines: List[str]) -> None:
+        """依次处理非交互输入的各行"""
+        for line in lines:
+            if self.state == REPLState.EXITING:
+                break
+            try:
+                await self._process_input(line.strip())
+            except Exception as e:
+                logger.error(f"[REPL] 错误: {e}")
+                print(f"❌ 错误: {e}")
+    
     def _setup_callbacks(self) -> None:
         """设置回调"""
         if not self._executor:
@@ -122,18 +187,44 @@ class REPL:
         
         def on_stream(event: StreamEvent):
             if event.type == StreamEventType.CONTENT:
-                print(event.content, end="", flush=True)
+                self._write_stream(event.content)
             elif event.type == StreamEventType.THOUGHT:
                 if event.thought and event.thought.description:
+                    self._flush_stream()
                     print(f"\n💭 {event.thought.description}")
         
         def on_output(msg: str):
+            self._flush_stream()
             print(msg)
         
         if self.repl_config.stream_enabled:
             self._executor.on_stream_event(on_stream)
         self._executor.on_output(on_output)
     
+    def _write_stream(self, content: str) -> None:
+        """缓冲流式内容，遇到换行或累计足够 token 时一次写出"""
+        self._stream_buffer.append(content)
+        if "\n" in content or len(self._stream_buffer) >= STREAM_FLUSH_TOKENS:
+            self._flush_stream()
+        elif self._stream_flush_handle is None:
+            # 保证末尾不足阈值的内容也能及时显示
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._flush_stream()
+                return
+            self._stream_flush_handle = loop.call_later(STREAM_FLUSH_DELAY, self._flush_stream)
+    
+    def _flush_stream(self) -> None:
+        """写出缓冲的流式内容"""
+        if self._stream_flush_handle is not None:
+            self._stream_flush_handle.cancel()
+            self._stream_flush_handle = None
+        if self._stream_buffer:
+            sys.stdout.write("".join(self._stream_buffer))
+            sys.stdout.flush()
+            self._stream_buffer.clear()
+    
     async def _get_input(self) -> Optional[str]:
         """获取用户输入"""
         prompt = self.repl_config.prompt
@@ -143,11 +234,11 @@ class REPL:
         
         try:
             # 异步读取输入
-            loop = asyncio.get_event_loop()
-            user_input = await loop.run_in_executor(
-                None,
-                lambda: input(prompt)
-            )
+            if self._session is not None:
+                return (await self._session.prompt_async(prompt)).strip()
+            
+            loop = asyncio.get_running_loop()
+            user_input = await loop.run_in_executor(self._input_pool, input, prompt)
             return user_input.strip()
         except EOFError:
             return None
@@ -163,7 +254,7 @@ class REPL:
             return
         
         # 检查内置命令
-        if user_input.startswith("/") or user_input in ["help", "exit", "quit", "status"]:
+        if user_input[:1] == "/" or user_input in _BUILTIN_NAMES:
             result = await self._command_handler.handle(user_input)
             if result.output:
                 print(result.output)
@@ -188,6 +279,7 @@ class REPL:
                 user_input=command,
                 abort_signal=self._abort_signal,
             )
+            self._flush_stream()
             
             print()  # 响应后空行
             
@@ -195,27 +287,26 @@ class REPL:
                 print(f"❌ 执行失败: {result.content}")
             
         finally:
+            self._flush_stream()
             self.state = REPLState.IDLE
     
     async def _handle_confirmation_input(self, user_input: str) -> None:
         """处理确认输入"""
-        user_input = user_input.lower()
-        
-        if user_input in ["y", "yes", "确认", "是"]:
-            outcome = ToolConfirmationOutcome.PROCEED_ONCE
-        elif user_input in ["n", "no", "取消", "否"]:
-            outcome = ToolConfirmationOutcome.CANCEL
-        elif user_input in ["a", "always", "总是"]:
-            outcome = ToolConfirmationOutcome.PROCEED_ALWAYS
-        else:
+        outcome = _CONFIRM_MAP.get(user_input)
+        if outcome is None:
+            outcome = _CONFIRM_MAP.get(user_input.lower())
+        if outcome is None:
             print("请输入 y(确认)/n(取消)/a(总是确认)")
             return
         
-        # 处理所有待确认项
-        for call_id, info in list(self._pending_confirmations.items()):
-            if info.get("on_confirm"):
-                await info["on_confirm"](outcome, None)
-            del self._pending_confirmations[call_id]
+        # 取出所有待确认项（逐项弹出，不额外复制整个字典），各回调相互独立，并发执行
+        callbacks = []
+        while self._pending_confirmations:
+            _, info = self._pending_confirmations.popitem()
+            on_confirm = info.get("on_confirm")
+            if on_confirm:
+                callbacks.append(on_confirm(outcome, None))
+        await asyncio.gather(*callbacks)
         
         self.state = REPLState.IDLE
     
@@ -242,12 +333,32 @@ class REPL:
     def exit(self) -> None:
         """退出 REPL"""
         self.state = REPLState.EXITING
+        self._input_pool.shutdown(wait=False)
     
-    def cancel_execution(self) -> None:
-        """取消当前执行"""
+    def _call_in_loop(self, callback: Callable[[], None]) -> None:
+        """在事件循环线程中执行回调（可从任意线程调用）"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            callback()
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            callback()
+        else:
+            loop.call_soon_threadsafe(callback)
+    
+    def _cancel_now(self) -> None:
+        """设置中断信号并取消进行中的工具调用（须在事件循环线程调用）"""
         self._abort_signal.set()
         if self._executor:
             self._executor.cancel()
+    
+    def cancel_execution(self) -> None:
+        """取消当前执行（可从任意线程调用）"""
+        self._call_in_loop(self._cancel_now)
 
 
 class SimpleREPL:
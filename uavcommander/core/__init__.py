@@ -4,10 +4,7 @@ UAV Commander Core 模块
 提供核心功能组件。
 """
 
-from . import schema
-from . import config
-from . import agent
-from . import tools
+import importlib
 
 __all__ = [
     "schema",
@@ -16,3 +13,10 @@ __all__ = [
     "tools",
 ]
 
+
+def __getattr__(name: str):
+    """按需加载子模块，避免导入 core.config 时连带加载 agent/tools"""
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
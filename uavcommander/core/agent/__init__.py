@@ -10,6 +10,7 @@ from .basellm import (
     StreamEventType,
     LLMResponse,
     LLMWithFallback,
+    cached_llm,
 )
 
 from .llm import (
@@ -25,6 +26,7 @@ from .context import (
     ContextManager,
     ContextSummary,
     get_context_manager,
+    llm_summarizer,
 )
 
 from .registry import (
@@ -43,6 +45,8 @@ from .prompts import (
     PromptManager,
     get_prompt_manager,
     COORDINATOR_SYSTEM_PROMPT,
+    COORDINATOR_STATIC_PREFIX,
+    coordinator_dynamic_suffix,
     FORMATION_AGENT_PROMPT,
     NAVIGATION_AGENT_PROMPT,
     SEARCH_AGENT_PROMPT,
@@ -83,6 +87,7 @@ __all__ = [
     "StreamEventType",
     "LLMResponse",
     "LLMWithFallback",
+    "cached_llm",
     # llm
     "OpenAILLM",
     "AnthropicLLM",
@@ -94,6 +99,7 @@ __all__ = [
     "ContextManager",
     "ContextSummary",
     "get_context_manager",
+    "llm_summarizer",
     # registry
     "AgentType",
     "AgentCapability",
@@ -108,6 +114,8 @@ __all__ = [
     "PromptManager",
     "get_prompt_manager",
     "COORDINATOR_SYSTEM_PROMPT",
+    "COORDINATOR_STATIC_PREFIX",
+    "coordinator_dynamic_suffix",
     "FORMATION_AGENT_PROMPT",
     "NAVIGATION_AGENT_PROMPT",
     "SEARCH_AGENT_PROMPT",
@@ -5,9 +5,10 @@ Automator - 多轮对话自动驱动和任务完成判断。
 """
 
 import asyncio
-from typing import Optional, Dict, List, Any, Callable, Awaitable
-from dataclasses import dataclass, field
-from datetime import datetime
+import re
+import time
+from typing import Optional, Dict, List, Any, Callable, Awaitable, Union
+from dataclasses import dataclass, field, asdict
 from enum import Enum
 import logging
 
@@ -17,6 +18,25 @@ from .registry import AgentDefinition
 
 logger = logging.getLogger(__name__)
 
+# 响应中表示任务完成的短语
+COMPLETION_PHRASES = (
+    "任务完成",
+    "已完成",
+    "执行成功",
+    "操作成功",
+    "已经完成",
+)
+
+# 响应中表示需要用户输入的短语
+QUESTION_PHRASES = (
+    "请问",
+    "您需要",
+    "是否",
+    "请选择",
+    "请确认",
+    "？",
+)
+
 
 class AutomatorState(Enum):
     """自动执行器状态"""
@@ -45,8 +65,22 @@ class AutomatorConfig:
     # 是否需要用户确认继续
     require_confirmation: bool = False
     
-    # 完成判断回调
-    completion_checker: Optional[Callable[[str], bool]] = None
+    # 完成判断回调；也可传入正则表达式字符串（忽略大小写匹配即视为完成）
+    completion_checker: Optional[Union[str, Callable[[str], Any]]] = None
+    
+    def __post_init__(self):
+        if isinstance(self.completion_checker, str):
+            self.completion_checker = re.compile(self.completion_checker, re.IGNORECASE).search
+
+
+@dataclass(slots=True)
+class _HistoryEntry:
+    """单轮执行记录"""
+    
+    turn: int
+    input: str
+    output: str
+    tool_calls: int
 
 
 @dataclass
@@ -80,15 +114,23 @@ class Automator:
     ):
         self.executor = executor
         self.config = config or AutomatorConfig()
+        self._completion_fn = self.config.completion_checker
         
         self.state = AutomatorState.IDLE
         self._current_turn = 0
         self._total_tool_calls = 0
-        self._history: List[Dict[str, Any]] = []
+        self._history: List[_HistoryEntry] = []
         
         self._abort_signal = asyncio.Event()
         self._continue_signal = asyncio.Event()
         
+        # 等待输入时复用的等待任务（仅在触发后重建）
+        self._continue_wait_task: Optional[asyncio.Task] = None
+        self._abort_wait_task: Optional[asyncio.Task] = None
+        
+        # 单轮超时：由定时回调取消运行任务，并标记为超时
+        self._turn_timed_out = False
+        
         # 回调
         self._on_turn_complete: Optional[Callable[[int, str], Awaitable[None]]] = None
         self._on_state_change: Optional[Callable[[AutomatorState], None]] = None
@@ -133,10 +175,12 @@ class Automator:
         self._current_turn = 0
         self._total_tool_calls = 0
         self._history.clear()
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         current_input = initial_input
         final_response = ""
+        loop = asyncio.get_running_loop()
+        run_task = asyncio.current_task()
         
         try:
             # 设置总超时
@@ -148,26 +192,36 @@ class Automator:
                         break
                     
                     self._current_turn += 1
-                    logger.info(f"[Automator] 自动轮次 {self._current_turn}")
+                    logger.info("[Automator] 自动轮次 %d", self._current_turn)
                     
                     # 执行一轮
+                    self._turn_timed_out = False
+                    deadline = loop.call_at(
+                        loop.time() + self.config.turn_timeout,
+                        self._on_turn_timeout,
+                        run_task,
+                    )
                     try:
-                        async with asyncio.timeout(self.config.turn_timeout):
-                            result = await self.executor.run(
-                                user_input=current_input,
-                                abort_signal=self._abort_signal,
-                            )
-                    except asyncio.TimeoutError:
-                        logger.warning(f"[Automator] 轮次 {self._current_turn} 超时")
+                        result = await self.executor.run(
+                            user_input=current_input,
+                            abort_signal=self._abort_signal,
+                        )
+                    except asyncio.CancelledError:
+                        # 仅由本轮超时引起的取消才吞掉，其余（总超时、外部取消）继续传播
+                        if not self._turn_timed_out or run_task.uncancel() > 0:
+                            raise
+                        logger.warning("[Automator] 轮次 %d 超时", self._current_turn)
                         continue
+                    finally:
+                        deadline.cancel()
                     
                     # 记录历史
-                    self._history.append({
-                        "turn": self._current_turn,
-                        "input": current_input,
-                        "output": result.content,
-                        "tool_calls": result.tool_calls_count,
-                    })
+                    self._history.append(_HistoryEntry(
+                        turn=self._current_turn,
+                        input=current_input,
+                        output=result.content,
+                        tool_calls=result.tool_calls_count,
+                    ))
                     
                     self._total_tool_calls += result.tool_calls_count
                     final_response = result.content
@@ -201,7 +255,7 @@ class Automator:
                         # 使用空输入继续
                         current_input = "继续"
             
-            duration = (datetime.now() - start_time).total_seconds() * 1000
+            duration = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             if self.state == AutomatorState.RUNNING:
                 self._set_state(AutomatorState.COMPLETED)
@@ -212,12 +266,12 @@ class Automator:
                 turns=self._current_turn,
                 total_tool_calls=self._total_tool_calls,
                 duration_ms=duration,
-                history=self._history,
+                history=self._history_dicts(),
             )
             
         except asyncio.TimeoutError:
             self._set_state(AutomatorState.FAILED)
-            duration = (datetime.now() - start_time).total_seconds() * 1000
+            duration = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             return AutomatorResult(
                 success=False,
@@ -225,13 +279,13 @@ class Automator:
                 turns=self._current_turn,
                 total_tool_calls=self._total_tool_calls,
                 duration_ms=duration,
-                history=self._history,
+                history=self._history_dicts(),
                 error="执行超时",
             )
             
         except Exception as e:
             self._set_state(AutomatorState.FAILED)
-            duration = (datetime.now() - start_time).total_seconds() * 1000
+            duration = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             return AutomatorResult(
                 success=False,
@@ -239,9 +293,16 @@ class Automator:
                 turns=self._current_turn,
                 total_tool_calls=self._total_tool_calls,
                 duration_ms=duration,
-                history=self._history,
+                history=self._history_dicts(),
                 error=str(e),
             )
+        
+        finally:
+            self._cancel_wait_tasks()
+    
+    def _history_dicts(self) -> List[Dict[str, Any]]:
+        """将执行记录转换为字典列表（仅在生成结果时转换一次）"""
+        return [asdict(entry) for entry in self._history]
     
     def _is_completed(self, result: ExecutorResult) -> bool:
         """判断是否完成"""
@@ -250,63 +311,61 @@ class Automator:
             return True
         
         # 使用自定义检查器
-        if self.config.completion_checker:
-            return self.config.completion_checker(result.content)
+        if self._completion_fn is not None:
+            return bool(self._completion_fn(result.content))
         
         # 检查响应中的完成标志
-        completion_phrases = [
-            "任务完成",
-            "已完成",
-            "执行成功",
-            "操作成功",
-            "已经完成",
-        ]
-        
-        for phrase in completion_phrases:
-            if phrase in result.content:
-                return True
-        
-        return False
+        content = result.content
+        return any(phrase in content for phrase in COMPLETION_PHRASES)
     
     def _needs_user_input(self, result: ExecutorResult) -> bool:
         """判断是否需要用户输入"""
         # 检查响应中的询问标志
-        question_phrases = [
-            "请问",
-            "您需要",
-            "是否",
-            "请选择",
-            "请确认",
-            "？",
-        ]
-        
-        for phrase in question_phrases:
-            if phrase in result.content:
-                return True
-        
-        return False
+        content = result.content
+        return any(phrase in content for phrase in QUESTION_PHRASES)
     
     async def _wait_for_input(self) -> Optional[str]:
         """等待用户输入"""
         self._continue_signal.clear()
         
-        # 等待输入或取消
-        done, pending = await asyncio.wait(
-            [
-                asyncio.create_task(self._continue_signal.wait()),
-                asyncio.create_task(self._abort_signal.wait()),
-            ],
+        # 等待输入或取消；未触发的等待任务保留到下一次使用
+        loop = asyncio.get_running_loop()
+        if not self._is_live_wait_task(self._continue_wait_task, loop):
+            self._continue_wait_task = asyncio.create_task(self._continue_signal.wait())
+        if not self._is_live_wait_task(self._abort_wait_task, loop):
+            self._abort_wait_task = asyncio.create_task(self._abort_signal.wait())
+        
+        await asyncio.wait(
+            [self._continue_wait_task, self._abort_wait_task],
             return_when=asyncio.FIRST_COMPLETED,
         )
         
-        for task in pending:
-            task.cancel()
-        
         if self._abort_signal.is_set():
             return None
         
         return getattr(self, "_pending_input", None)
     
+    @staticmethod
+    def _is_live_wait_task(
+        task: Optional[asyncio.Task],
+        loop: asyncio.AbstractEventLoop,
+    ) -> bool:
+        """等待任务是否仍可复用（未完成且属于当前事件循环）"""
+        return task is not None and not task.done() and task.get_loop() is loop
+    
+    def _on_turn_timeout(self, task: asyncio.Task) -> None:
+        """单轮超时回调"""
+        self._turn_timed_out = True
+        task.cancel()
+    
+    def _cancel_wait_tasks(self) -> None:
+        """取消遗留的等待任务"""
+        for task in (self._continue_wait_task, self._abort_wait_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._continue_wait_task = None
+        self._abort_wait_task = None
+    
     async def _wait_for_confirmation(self) -> bool:
         """等待确认继续"""
         return await self._wait_for_input() is not None
@@ -5,7 +5,14 @@ LLM 抽象基类模块
 """
 
 import asyncio
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import (
     Optional,
     Dict,
@@ -15,6 +22,7 @@ from typing import (
     Callable,
     Awaitable,
     Union,
+    Sequence,
 )
 from dataclasses import dataclass, field
 from enum import Enum
@@ -30,6 +38,13 @@ from core.schema import (
 )
 from core.config import LLMSettings, ModelConfig
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -106,37 +121,77 @@ class BaseLLM(ABC):
         self._history: List[Dict[str, Any]] = []
         self._system_prompt: Optional[str] = None
         self._tools: List[ToolSchema] = []
+        # OpenAI 格式的工具列表，在 set_tools 时转换一次
+        self._tools_openai: Optional[List[Dict[str, Any]]] = None
+        # 系统提示 + 历史的 LLM 消息前缀，随 add_message 增量维护
+        self._rendered_prefix: List[Dict[str, Any]] = []
+        
+        # 响应缓存（精确匹配，LRU），容量为 0 时不启用
+        self._response_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._response_cache_hits = 0
+        self._response_cache_misses = 0
     
     @property
     def model_name(self) -> str:
         return self.model_config.name
     
+    @property
+    def system_prompt(self) -> Optional[str]:
+        return self._system_prompt
+    
     def set_system_prompt(self, prompt: str) -> None:
         """设置系统提示词"""
         self._system_prompt = prompt
+        self._rebuild_prefix()
     
     def set_tools(self, tools: List[ToolSchema]) -> None:
         """设置可用工具"""
         self._tools = tools
+        self._tools_openai = [t.to_openai_format() for t in tools] if tools else None
+    
+    @property
+    def openai_tools(self) -> Optional[List[Dict[str, Any]]]:
+        """OpenAI 格式的工具列表（只读，无工具时为 None）"""
+        return self._tools_openai
     
     def add_message(self, message: Message) -> None:
         """添加消息到历史"""
-        self._history.append(self._message_to_dict(message))
+        entry = self._message_to_dict(message)
+        self._history.append(entry)
+        self._rendered_prefix.append(entry)
     
     def add_tool_result(self, result: ToolResult) -> None:
         """添加工具结果到历史"""
-        self._history.append({
+        entry = {
             "role": "tool",
             "tool_call_id": result.call_id,
             "content": self._format_tool_result(result),
-        })
+        }
+        self._history.append(entry)
+        self._rendered_prefix.append(entry)
     
     def clear_history(self) -> None:
         """清空历史"""
         self._history.clear()
+        self._rebuild_prefix()
     
-    def get_history(self) -> List[Dict[str, Any]]:
-        """获取历史"""
+    def _rebuild_prefix(self) -> None:
+        """重建消息前缀"""
+        prefix = []
+        if self._system_prompt:
+            prefix.append({
+                "role": "system",
+                "content": self._system_prompt,
+            })
+        prefix.extend(self._history)
+        self._rendered_prefix = prefix
+    
+    def get_history(self) -> Sequence[Dict[str, Any]]:
+        """获取历史（只读视图，不复制；需要修改时使用 get_history_copy）"""
+        return self._history
+    
+    def get_history_copy(self) -> List[Dict[str, Any]]:
+        """获取历史副本"""
         return self._history.copy()
     
     @abstractmethod
@@ -181,6 +236,33 @@ class BaseLLM(ABC):
         """
         pass
     
+    async def generate_many(
+        self,
+        requests: List[Dict[str, Any]],
+        max_concurrency: int = 8,
+    ) -> List[LLMResponse]:
+        """
+        并发执行多个相互独立的 generate 请求
+        
+        Args:
+            requests: 每项为 generate 的关键字参数（messages、tools 等）
+            max_concurrency: 最大并发请求数
+        
+        Returns:
+            与输入顺序一致的响应；失败的请求返回 finish_reason="error" 的空响应
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def generate_one(request: Dict[str, Any]) -> LLMResponse:
+            async with semaphore:
+                try:
+                    return await self.generate(**request)
+                except Exception as e:
+                    logger.error("[LLM] 批量请求失败: %s", e)
+                    return LLMResponse(finish_reason="error", metadata={"error": str(e)})
+        
+        return list(await asyncio.gather(*(generate_one(r) for r in requests)))
+    
     async def chat(
         self,
         user_message: str,
@@ -201,35 +283,78 @@ class BaseLLM(ABC):
         # 构建消息列表
         messages = self._build_messages(user_message)
         
-        # 构建工具列表
-        tools = [t.to_openai_format() for t in self._tools] if self._tools else None
-        
         if stream:
-            return self.generate_stream(messages, tools, abort_signal)
+            return self.generate_stream(messages, self._tools_openai, abort_signal)
         else:
-            return await self.generate(messages, tools)
+            return await self.generate(messages, self._tools_openai)
     
     def _build_messages(self, user_message: str) -> List[Dict[str, Any]]:
-        """构建消息列表"""
-        messages = []
-        
-        # 添加系统提示
-        if self._system_prompt:
-            messages.append({
-                "role": "system",
-                "content": self._system_prompt,
-            })
-        
-        # 添加历史消息
-        messages.extend(self._history)
-        
-        # 添加用户消息
-        messages.append({
-            "role": "user",
-            "content": user_message,
-        })
+        """构建消息列表（系统提示 + 历史 + 用户消息）"""
+        return [*self._rendered_prefix, {"role": "user", "content": user_message}]
+    
+    def _response_cache_key(
+        self,
+        kind: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        kwargs: Dict[str, Any],
+    ) -> Optional[str]:
+        """计算响应缓存键（规范化 JSON 的 BLAKE2b），未启用缓存时返回 None"""
+        if self.settings.response_cache_size <= 0:
+            return None
         
-        return messages
+        mc = self.model_config
+        payload = [
+            kind, mc.name, mc.temperature, mc.top_p, mc.max_tokens,
+            messages, tools, kwargs,
+        ]
+        if HAS_ORJSON:
+            data = orjson.dumps(
+                payload,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+                default=str,
+            )
+        else:
+            data = json.dumps(
+                payload, sort_keys=True, ensure_ascii=False, default=str
+            ).encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    def _response_cache_get(self, key: str) -> Optional[Any]:
+        """读取缓存响应（返回副本，调用方修改不影响缓存），过期条目视为未命中"""
+        entry = self._response_cache.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or time.monotonic() < expires_at:
+                self._response_cache.move_to_end(key)
+                self._response_cache_hits += 1
+                return copy.deepcopy(value)
+            del self._response_cache[key]
+        self._response_cache_misses += 1
+        return None
+    
+    def _response_cache_put(self, key: str, value: Any) -> None:
+        """写入缓存响应"""
+        ttl = self.settings.response_cache_ttl
+        expires_at = time.monotonic() + ttl if ttl > 0 else None
+        self._response_cache[key] = (value, expires_at)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self.settings.response_cache_size:
+            self._response_cache.popitem(last=False)
+    
+    def clear_response_cache(self) -> None:
+        """清空响应缓存"""
+        self._response_cache.clear()
+        self._response_cache_hits = 0
+        self._response_cache_misses = 0
+    
+    def get_response_cache_stats(self) -> Dict[str, int]:
+        """获取响应缓存统计"""
+        return {
+            "size": len(self._response_cache),
+            "hits": self._response_cache_hits,
+            "misses": self._response_cache_misses,
+        }
     
     def _message_to_dict(self, message: Message) -> Dict[str, Any]:
         """将 Message 转换为字典"""
@@ -240,15 +365,85 @@ class BaseLLM(ABC):
     
     def _format_tool_result(self, result: ToolResult) -> str:
         """格式化工具结果"""
-        if result.llm_content:
-            parts = []
-            for item in result.llm_content:
-                if isinstance(item, dict) and "text" in item:
-                    parts.append(item["text"])
-                elif isinstance(item, str):
-                    parts.append(item)
-            return "\n".join(parts)
-        return result.display_content or ""
+        parts = result.llm_content
+        if not parts:
+            return result.display_content or ""
+        if len(parts) == 1:
+            item = parts[0]
+            if isinstance(item, dict):
+                return item.get("text", "")
+            return item if isinstance(item, str) else ""
+        return "\n".join(
+            item["text"] if isinstance(item, dict) else item
+            for item in parts
+            if (isinstance(item, dict) and "text" in item) or isinstance(item, str)
+        )
+
+
+def cached_llm(func):
+    """
+    LLM 响应缓存装饰器
+    
+    用于 BaseLLM 子类的 generate / generate_stream。相同的模型、消息、工具
+    和参数直接返回缓存结果，不再发起请求；仅在
+    settings.response_cache_size > 0 时生效，条目在 response_cache_ttl 秒后过期。流式调用在未命中时边转发边缓冲，
+    正常结束（未中断、无错误）后才写入缓存，命中时回放事件。
+    
+    缓存保存的是快照，命中时返回副本：调度器会原地修改 ToolCallRequest.args
+    （MODIFY 确认），不能让修改影响后续命中。
+    """
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def stream_wrapper(
+            self: BaseLLM,
+            messages: List[Dict[str, Any]],
+            tools: Optional[List[Dict[str, Any]]] = None,
+            abort_signal: Optional[asyncio.Event] = None,
+            **kwargs,
+        ) -> AsyncGenerator[StreamEvent, None]:
+            key = self._response_cache_key("stream", messages, tools, kwargs)
+            cached = self._response_cache_get(key) if key else None
+            if cached is not None:
+                for event in cached:
+                    yield event
+                return
+            
+            events: List[StreamEvent] = []
+            async for event in func(self, messages, tools, abort_signal, **kwargs):
+                if key:
+                    events.append(copy.deepcopy(event))
+                yield event
+            
+            if (
+                key
+                and events
+                and events[-1].type == StreamEventType.FINISHED
+                and not (abort_signal and abort_signal.is_set())
+                and all(e.type != StreamEventType.ERROR for e in events)
+            ):
+                self._response_cache_put(key, events)
+        
+        return stream_wrapper
+    
+    @functools.wraps(func)
+    async def wrapper(
+        self: BaseLLM,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs,
+    ) -> LLMResponse:
+        key = self._response_cache_key("generate", messages, tools, kwargs)
+        if key:
+            cached = self._response_cache_get(key)
+            if cached is not None:
+                return cached
+        
+        response = await func(self, messages, tools, **kwargs)
+        if key:
+            self._response_cache_put(key, copy.deepcopy(response))
+        return response
+    
+    return wrapper
 
 
 class LLMWithFallback(BaseLLM):
@@ -278,12 +473,24 @@ class LLMWithFallback(BaseLLM):
             logger.warning(f"主 LLM 失败: {e}, 尝试回退")
             return await self._handle_fallback(messages, tools, **kwargs)
     
-    async def generate_stream(
+    def generate_stream(
         self,
         messages: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
         abort_signal: Optional[asyncio.Event] = None,
         **kwargs,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        # 未配置任何回退时直接返回主 LLM 的流，省去逐事件转发的一层生成器
+        if self.fallback is None and self.fallback_handler is None:
+            return self.primary.generate_stream(messages, tools, abort_signal, **kwargs)
+        return self._generate_stream_with_fallback(messages, tools, abort_signal, **kwargs)
+    
+    async def _generate_stream_with_fallback(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        abort_signal: Optional[asyncio.Event],
+        **kwargs,
     ) -> AsyncGenerator[StreamEvent, None]:
         try:
             async for event in self.primary.generate_stream(
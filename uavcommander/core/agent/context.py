@@ -5,17 +5,44 @@
 """
 
 import asyncio
-from typing import Optional, Dict, List, Any
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional, Dict, List, Any, Callable, Awaitable, Set
 from dataclasses import dataclass, field
 from datetime import datetime
 import uuid
 import json
+import hashlib
 import logging
 
-from core.schema import Message, MessageRole, ConversationContext
+from core.schema import (
+    Message,
+    MessageRole,
+    MessagePart,
+    ContentType,
+    ConversationContext,
+)
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# 异步摘要函数：接收被压缩的消息，返回摘要文本
+Summarizer = Callable[[List[Message]], Awaitable[str]]
+
+ARCHIVED_TEXT = "[archived]"
+
+SUMMARY_PROMPT = (
+    "请将以下无人机任务对话压缩为简洁摘要，保留关键指令、状态、位置和未完成事项，"
+    "不超过 200 字。"
+)
+
 
 @dataclass
 class ContextConfig:
@@ -31,6 +58,12 @@ class ContextConfig:
     compress_threshold: int = 6000
     # 保留的最近消息数（压缩时）
     preserve_recent: int = 10
+    # 未归档消息超过此数量时归档旧消息正文（evict 时）
+    archive_after: int = 30
+    # 归档时保留正文的最近消息数
+    archive_keep_recent: int = 5
+    # 是否用 LLM 在后台生成压缩摘要（由执行器安装 llm_summarizer，默认关闭）
+    llm_summary: bool = False
 
 
 @dataclass
@@ -43,6 +76,42 @@ class ContextSummary:
     timestamp: datetime = field(default_factory=datetime.now)
 
 
+_ROLE_MAP: Dict[str, MessageRole] = {r.value: r for r in MessageRole}
+_CONTENT_TYPE_MAP: Dict[str, ContentType] = {t.value: t for t in ContentType}
+
+
+def _render(message: Message) -> Dict[str, Any]:
+    """将单条消息转换为 LLM 格式"""
+    return {"role": message.role.value, "content": message.text_content}
+
+
+def _build_msg(data: Dict[str, Any], context_id: str) -> Message:
+    """从 Message.to_dict 的结果重建消息（兼容仅含 content 的旧格式）"""
+    parts_data = data.get("parts")
+    if parts_data is not None:
+        parts = [
+            MessagePart(
+                type=_CONTENT_TYPE_MAP[p["type"]],
+                content=p.get("content"),
+                metadata=p.get("metadata"),
+            )
+            for p in parts_data
+        ]
+    else:
+        parts = [MessagePart.text(data.get("content", ""))]
+    
+    timestamp = data.get("timestamp")
+    return Message(
+        role=_ROLE_MAP[data["role"]],
+        parts=parts,
+        message_id=data.get("message_id") or uuid.uuid4().hex,
+        timestamp=datetime.fromisoformat(timestamp) if timestamp else datetime.now(),
+        task_id=data.get("task_id"),
+        context_id=context_id,
+        metadata=data.get("metadata"),
+    )
+
+
 class Context:
     """上下文管理器"""
     
@@ -58,6 +127,17 @@ class Context:
         self._summaries: List[ContextSummary] = []
         self._metadata: Dict[str, Any] = {}
         self._token_count: int = 0
+        # 每条消息的 token 估算（message_id -> token 数），避免压缩时重复估算
+        self._message_tokens: Dict[str, int] = {}
+        # 当前压缩阈值；压缩无法减少 token 时上调，避免反复无效压缩
+        self._compress_threshold: int = self.config.compress_threshold
+        # 可选的异步摘要函数及进行中的摘要任务
+        self._summarizer: Optional[Summarizer] = None
+        self._summary_tasks: Set[asyncio.Task] = set()
+        # 开头已归档（正文被替换）的消息数
+        self._archived_count = 0
+        # 对话消息的 LLM 格式，与 messages 一一对应，随增删增量维护
+        self._rendered: List[Dict[str, Any]] = []
     
     @property
     def messages(self) -> List[Message]:
@@ -72,12 +152,15 @@ class Context:
     def add_message(self, message: Message) -> None:
         """添加消息"""
         self._conversation.add_message(message)
-        self._token_count += self._estimate_tokens(message)
+        self._rendered.append(_render(message))
+        tokens = self._estimate_tokens(message)
+        self._message_tokens[message.message_id] = tokens
+        self._token_count += tokens
         
         # 检查是否需要压缩
         if (
             self.config.auto_compress and
-            self._token_count > self.config.compress_threshold
+            self._token_count > self._compress_threshold
         ):
             self._compress()
     
@@ -112,10 +195,22 @@ class Context:
         
         return messages
     
-    def get_llm_messages(self) -> List[Dict[str, Any]]:
-        """获取 LLM 格式的消息"""
+    def get_llm_messages(
+        self,
+        system_prompt: Optional[str] = None,
+        state_prompt: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        获取 LLM 格式的消息
+        
+        顺序固定为 [系统提示词, 历史摘要, 动态状态, 对话消息]，对话消息只追加，
+        使前缀在各轮之间保持不变，便于服务端提示缓存命中。
+        """
         messages = []
         
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
         # 添加摘要（如果有）
         if self._summaries:
             summary_text = self._format_summaries()
@@ -124,8 +219,13 @@ class Context:
                 "content": f"[历史摘要]\n{summary_text}",
             })
         
-        # 添加对话消息
-        messages.extend(self._conversation.to_llm_format())
+        if state_prompt:
+            messages.append({"role": "system", "content": state_prompt})
+        
+        # 添加对话消息；messages 被外部直接修改时重建
+        if len(self._rendered) != len(self._conversation.messages):
+            self._rendered = [_render(m) for m in self._conversation.messages]
+        messages.extend(self._rendered)
         
         return messages
     
@@ -142,6 +242,13 @@ class Context:
         self._conversation = ConversationContext(context_id=self.context_id)
         self._summaries.clear()
         self._token_count = 0
+        self._message_tokens.clear()
+        self._compress_threshold = self.config.compress_threshold
+        self._archived_count = 0
+        self._rendered = []
+        for task in self._summary_tasks:
+            task.cancel()
+        self._summary_tasks.clear()
     
     def _estimate_tokens(self, message: Message) -> int:
         """估算消息的 token 数"""
@@ -149,29 +256,144 @@ class Context:
         text = message.text_content
         return len(text) // 4 + 1
     
+    def _estimate_tokens_bulk(self, messages: List[Message]) -> int:
+        """批量估算 token 数，同时记录每条消息的估算值"""
+        message_tokens = self._message_tokens
+        total = 0
+        for m in messages:
+            tokens = len(m.text_content) // 4 + 1
+            message_tokens[m.message_id] = tokens
+            total += tokens
+        return total
+    
     def _compress(self) -> None:
         """压缩上下文"""
         if self.message_count <= self.config.preserve_recent:
             return
         
-        logger.info(f"[Context] 压缩上下文: {self.message_count} 条消息")
+        logger.info("[Context] 压缩上下文: %d 条消息", self.message_count)
         
         # 获取需要压缩的消息
         messages_to_compress = self.messages[:-self.config.preserve_recent]
         
+        message_tokens = self._message_tokens
+        dropped_tokens = 0
+        for m in messages_to_compress:
+            tokens = message_tokens.get(m.message_id)
+            dropped_tokens += tokens if tokens is not None else self._estimate_tokens(m)
+        
+        # 摘要不比原消息小多少时跳过压缩，并上调阈值
+        if self._estimate_summary_tokens(messages_to_compress) > 0.8 * dropped_tokens:
+            self._compress_threshold += max(1, self.config.max_tokens // 10)
+            logger.info(
+                "[Context] 压缩收益不足，跳过; 阈值调整为 %d", self._compress_threshold
+            )
+            return
+        
         # 生成摘要
         summary = self._generate_summary(messages_to_compress)
         self._summaries.append(summary)
+        if self._summarizer is not None:
+            self._schedule_summary(summary, messages_to_compress)
         
         # 保留最近的消息
         self._conversation.messages = self.messages[-self.config.preserve_recent:]
+        del self._rendered[:len(messages_to_compress)]
+        self._archived_count = max(0, self._archived_count - len(messages_to_compress))
         
-        # 重新计算 token
-        self._token_count = sum(
-            self._estimate_tokens(m) for m in self._conversation.messages
-        )
+        # 增量扣除被压缩消息的 token
+        for m in messages_to_compress:
+            message_tokens.pop(m.message_id, None)
+        self._token_count = max(0, self._token_count - dropped_tokens)
         
-        logger.info(f"[Context] 压缩后: {self.message_count} 条消息")
+        logger.info("[Context] 压缩后: %d 条消息", self.message_count)
+    
+    def evict(self) -> int:
+        """
+        裁剪旧消息内容（幂等），在每次调用 LLM 前执行
+        
+        未归档消息超过 archive_after 条时，将除最近 archive_keep_recent 条以外的
+        消息正文替换为 [archived]。消息条数与顺序不变；按批归档，两次归档之间
+        消息前缀保持不变，不影响服务端提示缓存。
+        
+        Returns:
+            释放的 token 估算数
+        """
+        messages = self._conversation.messages
+        if len(messages) - self._archived_count <= self.config.archive_after:
+            return 0
+        
+        start = self._archived_count
+        end = len(messages) - self.config.archive_keep_recent
+        freed = 0
+        rendered = self._rendered if len(self._rendered) == len(messages) else None
+        for i in range(start, end):
+            m = messages[i]
+            m.parts = [MessagePart.text(ARCHIVED_TEXT)]
+            m.metadata = {**(m.metadata or {}), "archived": True}
+            freed += self._retoken(m)
+            if rendered is not None:
+                rendered[i] = _render(m)
+        self._archived_count = end
+        
+        logger.info("[Context] 归档 %d 条旧消息", end - start)
+        return freed
+    
+    def _retoken(self, message: Message) -> int:
+        """重新估算消息 token 并更新总数，返回减少的 token 数"""
+        old = self._message_tokens.get(message.message_id, 0)
+        new = self._estimate_tokens(message)
+        self._message_tokens[message.message_id] = new
+        self._token_count += new - old
+        return old - new
+    
+    def set_summarizer(self, summarizer: Optional[Summarizer]) -> None:
+        """
+        设置异步摘要函数
+        
+        压缩时先写入截断摘要，再在后台调用 summarizer 生成摘要并原地替换，
+        不阻塞当前轮次；无运行中的事件循环或调用失败时保留截断摘要。
+        """
+        self._summarizer = summarizer
+    
+    def _schedule_summary(
+        self, summary: ContextSummary, messages: List[Message]
+    ) -> None:
+        """在后台细化摘要"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._refine_summary(summary, messages))
+        self._summary_tasks.add(task)
+        task.add_done_callback(self._summary_tasks.discard)
+    
+    async def _refine_summary(
+        self, summary: ContextSummary, messages: List[Message]
+    ) -> None:
+        """调用摘要函数并替换截断摘要"""
+        try:
+            text = await self._summarizer(messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("[Context] 异步摘要失败: %s", e)
+            return
+        if text:
+            summary.summary = text
+    
+    async def wait_summaries(self) -> None:
+        """等待进行中的异步摘要完成"""
+        if self._summary_tasks:
+            await asyncio.gather(*self._summary_tasks, return_exceptions=True)
+    
+    @staticmethod
+    def _estimate_summary_tokens(messages: List[Message]) -> int:
+        """估算 _generate_summary 生成的摘要 token 数（只取前 5 条要点）"""
+        chars = 10
+        for m in messages[:5]:
+            chars += min(len(m.text_content), 103) + 3
+        return chars // 4 + 1
     
     def _generate_summary(self, messages: List[Message]) -> ContextSummary:
         """生成消息摘要"""
@@ -201,6 +423,26 @@ class Context:
             parts.append(f"摘要 {i}:\n{summary.summary}")
         return "\n\n".join(parts)
     
+    def content_hash(self) -> bytes:
+        """
+        计算上下文内容哈希（摘要 + 各消息角色与文本）
+        
+        逐条写入 BLAKE2b，不构建 to_dict 的中间结构，可用作缓存键。
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.context_id.encode())
+        h.update(b"\0")
+        for summary in self._summaries:
+            h.update(summary.summary.encode())
+            h.update(b"\0")
+        h.update(b"\1")
+        for m in self._conversation.messages:
+            h.update(m.role.value.encode())
+            h.update(b"\0")
+            h.update(m.text_content.encode())
+            h.update(b"\0")
+        return h.digest()
+    
     def to_dict(self) -> Dict[str, Any]:
         """序列化为字典"""
         return {
@@ -218,36 +460,80 @@ class Context:
             "token_count": self._token_count,
         }
     
+    def to_bytes(self) -> bytes:
+        """序列化为 JSON 字节串（优先使用 orjson）"""
+        if HAS_ORJSON:
+            return orjson.dumps(self.to_dict(), default=str)
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=str).encode("utf-8")
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Context":
+        """从 JSON 字节串反序列化"""
+        return cls.from_dict(orjson.loads(data) if HAS_ORJSON else json.loads(data))
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Context":
         """从字典反序列化"""
         context = cls(context_id=data["context_id"])
         context._metadata = data.get("metadata", {})
-        context._token_count = data.get("token_count", 0)
         
         # 恢复消息
-        for msg_data in data.get("messages", []):
-            message = Message(
-                role=MessageRole(msg_data["role"]),
-                parts=[],
-                message_id=msg_data.get("message_id", str(uuid.uuid4())),
-                context_id=context.context_id,
-            )
-            # 简化处理
-            from core.schema import MessagePart
-            message.parts = [MessagePart.text(msg_data.get("content", ""))]
-            context._conversation.messages.append(message)
+        context_id = context.context_id
+        context._conversation.messages = [
+            _build_msg(d, context_id) for d in data.get("messages", ())
+        ]
+        
+        context._rendered = [_render(m) for m in context._conversation.messages]
+        context._token_count = context._estimate_tokens_bulk(context._conversation.messages)
         
         return context
 
 
+def llm_summarizer(llm: Any, max_chars: int = 8000) -> Summarizer:
+    """
+    基于 LLM 的摘要函数，用于 Context.set_summarizer
+    
+    Args:
+        llm: BaseLLM 实例（建议使用廉价模型）
+        max_chars: 发送给模型的对话文本上限（保留末尾）
+    """
+    async def summarize(messages: List[Message]) -> str:
+        transcript = "\n".join(f"{m.role.value}: {m.text_content}" for m in messages)
+        response = await llm.generate([
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript[-max_chars:]},
+        ])
+        return response.content.strip()
+    
+    return summarize
+
+
 class ContextManager:
-    """上下文管理器（多任务）"""
+    """
+    上下文管理器（多任务）
+    
+    最近使用的 max_contexts 个上下文由管理器强引用保留；更早的上下文被
+    淘汰出 LRU 后，若外部不再引用，会被自动回收。
+    """
     
-    def __init__(self):
-        self._contexts: Dict[str, Context] = {}
+    DEFAULT_MAX_CONTEXTS = 64
+    
+    def __init__(self, max_contexts: int = DEFAULT_MAX_CONTEXTS):
+        self.max_contexts = max_contexts
+        self._contexts: "weakref.WeakValueDictionary[str, Context]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._lru: "OrderedDict[str, Context]" = OrderedDict()
+        self._lock = threading.Lock()
         self._default_config = ContextConfig()
     
+    def _touch(self, context: Context) -> None:
+        """标记为最近使用，超出上限时淘汰最旧的强引用（需持有锁）"""
+        self._lru[context.context_id] = context
+        self._lru.move_to_end(context.context_id)
+        while len(self._lru) > self.max_contexts:
+            self._lru.popitem(last=False)
+    
     def create(
         self,
         context_id: Optional[str] = None,
@@ -255,12 +541,18 @@ class ContextManager:
     ) -> Context:
         """创建新上下文"""
         context = Context(context_id, config or self._default_config)
-        self._contexts[context.context_id] = context
+        with self._lock:
+            self._contexts[context.context_id] = context
+            self._touch(context)
         return context
     
     def get(self, context_id: str) -> Optional[Context]:
         """获取上下文"""
-        return self._contexts.get(context_id)
+        with self._lock:
+            context = self._contexts.get(context_id)
+            if context is not None:
+                self._touch(context)
+            return context
     
     def get_or_create(
         self,
@@ -268,24 +560,28 @@ class ContextManager:
         config: Optional[ContextConfig] = None,
     ) -> Context:
         """获取或创建上下文"""
-        if context_id in self._contexts:
-            return self._contexts[context_id]
+        context = self.get(context_id)
+        if context is not None:
+            return context
         return self.create(context_id, config)
     
     def delete(self, context_id: str) -> bool:
         """删除上下文"""
-        if context_id in self._contexts:
-            del self._contexts[context_id]
-            return True
-        return False
+        with self._lock:
+            context = self._contexts.pop(context_id, None)
+            self._lru.pop(context_id, None)
+            return context is not None
     
     def list_contexts(self) -> List[str]:
         """列出所有上下文 ID"""
-        return list(self._contexts.keys())
+        with self._lock:
+            return list(self._contexts.keys())
     
     def clear_all(self) -> None:
         """清空所有上下文"""
-        self._contexts.clear()
+        with self._lock:
+            self._lru.clear()
+            self._contexts.clear()
 
 
 # 全局上下文管理器
@@ -5,6 +5,7 @@ AgentExecutor - 驱动 Agent 运行的主循环。
 """
 
 import asyncio
+import io
 from typing import (
     Optional,
     Dict,
@@ -12,10 +13,12 @@ from typing import (
     Any,
     Callable,
     AsyncGenerator,
+    Awaitable,
+    TypeVar,
 )
-from dataclasses import dataclass, field
-from datetime import datetime
-import uuid
+from dataclasses import dataclass, field, replace
+import json
+import time
 import logging
 
 from core.schema import (
@@ -30,14 +33,16 @@ from core.schema import (
 from core.config import Config, get_config
 from .basellm import BaseLLM, StreamEvent, StreamEventType, LLMResponse
 from .llm import create_llm
-from .context import Context, ContextConfig
+from .context import Context, ContextConfig, llm_summarizer
 from .registry import AgentDefinition, get_agent_registry
 from .scheduler import CoreToolScheduler, SchedulerConfig
-from .invocation import SubagentInvocationBuilder
-from .prompts import get_prompt_manager
+from .invocation import SubagentInvocationBuilder, new_invocation_id
+from .prompts import COORDINATOR_STATIC_PREFIX, coordinator_dynamic_suffix
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 @dataclass
 class ExecutorResult:
@@ -59,6 +64,11 @@ class ExecutorConfig:
     max_tool_calls_per_turn: int = 10
     stream_enabled: bool = True
     auto_continue: bool = True  # 工具调用后自动继续
+    context: ContextConfig = field(default_factory=ContextConfig)  # 上下文配置
+
+
+# 进行中的无副作用工具调用（各执行器共享，键为工具名 + 规范化参数）
+_inflight_tool_calls: Dict[str, "asyncio.Future[ToolResult]"] = {}
 
 
 class AgentExecutor:
@@ -82,6 +92,8 @@ class AgentExecutor:
         self.agent_def = agent_def
         self.config = config or get_config()
         self.executor_config = executor_config or ExecutorConfig()
+        # 创建时的配置版本，执行器池据此判断是否可复用
+        self.config_version = self.config.get_version()
         
         # LLM 客户端
         self.llm = llm or create_llm(
@@ -89,7 +101,9 @@ class AgentExecutor:
         )
         
         # 上下文
-        self.context = Context(config=ContextConfig())
+        self.context = Context(config=self.executor_config.context)
+        if self.context.config.llm_summary:
+            self.context.set_summarizer(llm_summarizer(self.llm))
         
         # 工具调度器
         self.scheduler: Optional[CoreToolScheduler] = None
@@ -97,6 +111,9 @@ class AgentExecutor:
         # 子代理构建器
         self._subagent_builder = SubagentInvocationBuilder(self.config)
         
+        # 可共享执行结果的工具
+        self._pure_tools = frozenset(agent_def.pure_tools)
+        
         # 回调
         self._stream_callbacks: List[Callable[[StreamEvent], None]] = []
         self._output_callbacks: List[Callable[[str], None]] = []
@@ -107,9 +124,8 @@ class AgentExecutor:
         self._abort_signal: Optional[asyncio.Event] = None
         self._is_running = False
         
-        # 工具结果收集
-        self._completed_tools: List[CompletedToolCall] = []
-        self._tool_completion_event = asyncio.Event()
+        # 动态状态提示词，作为独立系统消息放在静态系统提示词之后
+        self._state_prompt: Optional[str] = None
         
         # 初始化
         self._setup()
@@ -117,16 +133,14 @@ class AgentExecutor:
     def _setup(self) -> None:
         """初始化设置"""
         # 设置系统提示词
-        prompt_manager = get_prompt_manager()
         if self.agent_def.system_prompt:
             self.llm.set_system_prompt(self.agent_def.system_prompt)
         elif self.agent_def.name == "coordinator":
-            prompt = prompt_manager.render(
-                "coordinator",
+            self.llm.set_system_prompt(COORDINATOR_STATIC_PREFIX)
+            self._state_prompt = coordinator_dynamic_suffix(
                 current_status="待获取",
                 available_uavs="待获取",
             )
-            self.llm.set_system_prompt(prompt)
         
         # 设置工具
         tools = self._build_tools()
@@ -139,6 +153,10 @@ class AgentExecutor:
             on_tool_calls_update=self._handle_tool_calls_update,
             on_all_tool_calls_complete=self._handle_all_tool_calls_complete,
             tool_executor=self._execute_tool,
+            # 一轮内的工具调用全部并发执行
+            scheduler_config=SchedulerConfig(
+                max_concurrent=self.executor_config.max_tool_calls_per_turn,
+            ),
         )
     
     def _build_tools(self) -> List[ToolSchema]:
@@ -156,6 +174,27 @@ class AgentExecutor:
         
         return tools
     
+    def reset(self) -> None:
+        """
+        重置会话状态以便复用
+        
+        清空上下文、LLM 历史、回调与计数；保留 LLM 客户端、系统提示词、
+        工具列表和调度器。
+        """
+        if self._is_running:
+            raise RuntimeError("Executor 正在运行中")
+        self.context.clear()
+        self.llm.clear_history()
+        self._stream_callbacks.clear()
+        self._output_callbacks.clear()
+        self._current_turn = 0
+        self._total_tool_calls = 0
+        self._abort_signal = None
+    
+    def set_state_prompt(self, state_prompt: Optional[str]) -> None:
+        """更新动态状态提示词（不改变系统提示词前缀）"""
+        self._state_prompt = state_prompt
+    
     def on_stream_event(self, callback: Callable[[StreamEvent], None]) -> None:
         """注册流式事件回调"""
         self._stream_callbacks.append(callback)
@@ -174,19 +213,22 @@ class AgentExecutor:
         
         Args:
             user_input: 用户输入
-            abort_signal: 中断信号
+            abort_signal: 中断信号（asyncio.Event；其他线程应通过
+                loop.call_soon_threadsafe(abort_signal.set) 设置）
         
         Returns:
             执行结果
         """
         if self._is_running:
             raise RuntimeError("Executor 正在运行中")
+        if abort_signal is not None and not isinstance(abort_signal, asyncio.Event):
+            raise TypeError("abort_signal 必须是 asyncio.Event")
         
         self._is_running = True
         self._abort_signal = abort_signal or asyncio.Event()
         self._current_turn = 0
         self._total_tool_calls = 0
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         final_content = ""
         
@@ -204,11 +246,14 @@ class AgentExecutor:
                 
                 logger.info(f"[Executor] 第 {self._current_turn} 轮")
                 
-                # 调用 LLM
+                # 调用 LLM；中断信号到达时立即取消
                 if self.executor_config.stream_enabled:
-                    response = await self._run_stream_turn()
+                    response = await self._until_aborted(self._run_stream_turn())
                 else:
-                    response = await self._run_turn()
+                    response = await self._until_aborted(self._run_turn())
+                if response is None:
+                    logger.info("[Executor] 收到中断信号")
+                    break
                 
                 # 处理响应
                 if response.content:
@@ -217,17 +262,17 @@ class AgentExecutor:
                 
                 # 处理工具调用
                 if response.has_tool_calls:
-                    await self._handle_tool_calls(response.tool_calls)
-                    
-                    # 等待工具完成
-                    await self._wait_for_tools()
+                    completed_tools = await self._until_aborted(
+                        self._handle_tool_calls(response.tool_calls)
+                    )
+                    if completed_tools is None:
+                        logger.info("[Executor] 收到中断信号")
+                        break
                     
                     # 添加工具结果到历史
-                    for completed in self._completed_tools:
+                    for completed in completed_tools:
                         self.llm.add_tool_result(completed.result)
                     
-                    self._completed_tools.clear()
-                    
                     # 自动继续
                     if not self.executor_config.auto_continue:
                         break
@@ -235,7 +280,7 @@ class AgentExecutor:
                     # 没有工具调用，结束
                     break
             
-            duration = (datetime.now() - start_time).total_seconds() * 1000
+            duration = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             return ExecutorResult(
                 success=True,
@@ -247,7 +292,7 @@ class AgentExecutor:
             
         except Exception as e:
             logger.error(f"[Executor] 执行失败: {e}")
-            duration = (datetime.now() - start_time).total_seconds() * 1000
+            duration = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             return ExecutorResult(
                 success=False,
@@ -260,19 +305,49 @@ class AgentExecutor:
         finally:
             self._is_running = False
     
+    async def _until_aborted(self, coro: Awaitable[T]) -> Optional[T]:
+        """
+        等待协程完成，中断信号先到达时取消它
+        
+        Returns:
+            协程结果；被中断时返回 None
+        """
+        task = asyncio.ensure_future(coro)
+        abort = asyncio.ensure_future(self._abort_signal.wait())
+        try:
+            await asyncio.wait((task, abort), return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            task.cancel()
+            abort.cancel()
+            raise
+        
+        if task.done():
+            abort.cancel()
+            return task.result()
+        
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return None
+    
     async def _run_turn(self) -> LLMResponse:
         """运行一轮（非流式）"""
-        messages = self.context.get_llm_messages()
-        tools = [t.to_openai_format() for t in self.llm._tools]
+        self.context.evict()
+        messages = self.context.get_llm_messages(
+            self.llm.system_prompt, self._state_prompt
+        )
+        tools = self.llm.openai_tools
         
         return await self.llm.generate(messages, tools)
     
     async def _run_stream_turn(self) -> LLMResponse:
         """运行一轮（流式）"""
-        messages = self.context.get_llm_messages()
-        tools = [t.to_openai_format() for t in self.llm._tools]
+        self.context.evict()
+        messages = self.context.get_llm_messages(
+            self.llm.system_prompt, self._state_prompt
+        )
+        tools = self.llm.openai_tools
         
-        content_parts = []
+        content_buf = io.StringIO()
         tool_calls = []
         
         async for event in self.llm.generate_stream(
@@ -286,59 +361,93 @@ class AgentExecutor:
                     logger.error(f"[Executor] 流回调失败: {e}")
             
             if event.type == StreamEventType.CONTENT:
-                content_parts.append(event.content)
+                if event.content:
+                    content_buf.write(event.content)
             elif event.type == StreamEventType.TOOL_CALL:
                 tool_calls.append(event.tool_call)
             elif event.type == StreamEventType.ERROR:
                 raise RuntimeError(event.error)
         
         return LLMResponse(
-            content="".join(content_parts),
+            content=content_buf.getvalue(),
             tool_calls=tool_calls,
         )
     
     async def _handle_tool_calls(
         self,
         tool_calls: List[ToolCallRequest],
-    ) -> None:
-        """处理工具调用"""
+    ) -> List[CompletedToolCall]:
+        """处理工具调用，返回已完成的调用"""
         if not tool_calls:
-            return
+            return []
         
         self._total_tool_calls += len(tool_calls)
         logger.info(f"[Executor] 处理 {len(tool_calls)} 个工具调用")
         
-        # 重置完成事件
-        self._tool_completion_event.clear()
-        
-        # 调度执行
-        await self.scheduler.schedule(tool_calls, self._abort_signal)
-    
-    async def _wait_for_tools(self) -> None:
-        """等待工具完成"""
-        if self.scheduler.is_idle():
-            return
-        
-        logger.info("[Executor] 等待工具完成...")
-        await self._tool_completion_event.wait()
+        return await self.scheduler.schedule(tool_calls, self._abort_signal)
     
     async def _execute_tool(
         self,
         tool_name: str,
         args: Dict[str, Any],
+        call_id: str = "",
     ) -> ToolResult:
-        """执行工具"""
+        """执行工具，结果的 call_id 与请求一致"""
+        call_id = call_id or new_invocation_id()
+        
         # 检查是否是子代理调用
         if self._subagent_builder.is_subagent_call(tool_name):
-            return await self._execute_subagent(tool_name, args)
+            return await self._execute_subagent(tool_name, args, call_id)
+        
+        # 无副作用工具：合并相同参数的并发调用
+        if tool_name in self._pure_tools:
+            return await self._execute_shared_tool(tool_name, args, call_id)
         
         # 普通工具调用
-        return await self._execute_regular_tool(tool_name, args)
+        return await self._execute_regular_tool(tool_name, args, call_id)
+    
+    async def _execute_shared_tool(
+        self,
+        tool_name: str,
+        args: Dict[str, Any],
+        call_id: str,
+    ) -> ToolResult:
+        """执行无副作用工具，进行中的相同调用只执行一次"""
+        key = f"{tool_name}|{json.dumps(args, sort_keys=True, default=str)}"
+        while (pending := _inflight_tool_calls.get(key)) is not None:
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if pending.cancelled() and not (task and task.cancelling()):
+                    # 执行方被取消而本调用没有：重新查找或自行执行
+                    continue
+                raise
+            return replace(result, call_id=call_id)
+        
+        future = asyncio.get_running_loop().create_future()
+        _inflight_tool_calls[key] = future
+        try:
+            result = await self._execute_regular_tool(tool_name, args, call_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            _inflight_tool_calls.pop(key, None)
     
     async def _execute_subagent(
         self,
         agent_name: str,
         args: Dict[str, Any],
+        call_id: str,
     ) -> ToolResult:
         """执行子代理"""
         task = args.get("task", "")
@@ -352,9 +461,10 @@ class AgentExecutor:
         
         if not invocation:
             return ToolResult.error_result(
-                call_id=str(uuid.uuid4()),
+                call_id=call_id,
                 error=f"未找到代理: {agent_name}",
             )
+        invocation.invocation_id = call_id
         
         def output_handler(msg: str):
             for callback in self._output_callbacks:
@@ -369,12 +479,13 @@ class AgentExecutor:
         self,
         tool_name: str,
         args: Dict[str, Any],
+        call_id: str,
     ) -> ToolResult:
         """执行普通工具"""
         # TODO: 实现工具注册表查找和执行
         # 临时返回模拟结果
         return ToolResult.success_result(
-            call_id=str(uuid.uuid4()),
+            call_id=call_id,
             content=f"工具 {tool_name} 执行完成，参数: {args}",
             display=f"✅ {tool_name} 完成",
         )
@@ -407,10 +518,7 @@ class AgentExecutor:
         self,
         completed_tools: List[CompletedToolCall],
     ) -> None:
-        """处理所有工具完成"""
-        self._completed_tools.extend(completed_tools)
-        self._tool_completion_event.set()
-        
+        """处理所有工具完成（仅用于日志，结果由 schedule 直接返回）"""
         logger.info(
             f"[Executor] 工具调用批次完成: "
             f"{[tc.request.name for tc in completed_tools]}"
@@ -5,9 +5,11 @@ SubagentInvocation - 将 Agent 封装为可调用工具。
 """
 
 import asyncio
-from typing import Optional, Dict, List, Any, Callable, Awaitable
+from typing import Optional, Dict, List, Any, Callable, Awaitable, TYPE_CHECKING
 from dataclasses import dataclass, field
 from datetime import datetime
+import itertools
+import time
 import uuid
 import logging
 
@@ -21,8 +23,23 @@ from core.config import Config
 from .registry import AgentDefinition, get_agent_registry
 from .basellm import StreamEvent, StreamEventType
 
+if TYPE_CHECKING:
+    from .executor import AgentExecutor
+
 logger = logging.getLogger(__name__)
 
+# 每个代理保留的空闲执行器上限
+EXECUTOR_POOL_SIZE = 4
+
+# 内部调用 ID：进程前缀 + 递增序号，避免每次调用读取随机数
+_PROCESS_ID = uuid.uuid4().hex[:12]
+_invocation_counter = itertools.count(1)
+
+
+def new_invocation_id() -> str:
+    """生成进程内唯一的调用 ID"""
+    return f"{_PROCESS_ID}-{next(_invocation_counter)}"
+
 
 @dataclass
 class InvocationResult:
@@ -51,6 +68,17 @@ class InvocationResult:
             )
 
 
+def _render_context_item(key: str, value: Any) -> str:
+    """渲染一项上下文（字典逐项缩进，列表逗号连接）"""
+    if isinstance(value, dict):
+        lines = [f"- {key}:"]
+        lines.extend(f"  - {k}: {v}" for k, v in value.items())
+        return "\n".join(lines)
+    if isinstance(value, list):
+        return f"- {key}: {', '.join(map(str, value))}"
+    return f"- {key}: {value}"
+
+
 class SubagentInvocation:
     """
     子代理执行容器
@@ -69,16 +97,22 @@ class SubagentInvocation:
         task: str,
         context: Optional[Dict[str, Any]] = None,
         parent_task_id: Optional[str] = None,
+        builder: Optional["SubagentInvocationBuilder"] = None,
     ):
         self.definition = definition
         self.config = config
         self.task = task
         self.context = context or {}
         self.parent_task_id = parent_task_id
+        # 提供执行器池的构建器；为空时每次新建执行器
+        self._builder = builder
         
-        self.invocation_id = str(uuid.uuid4())
+        self.invocation_id = new_invocation_id()
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
+        # 单调时钟计时（纳秒），用于计算时长
+        self._start_ns: Optional[int] = None
+        self._end_ns: Optional[int] = None
         
         # 活动回调
         self._on_activity: Optional[Callable[[str], None]] = None
@@ -101,27 +135,30 @@ class SubagentInvocation:
         执行子代理
         
         1. 输出 "Subagent starting..."
-        2. 创建 AgentExecutor
+        2. 获取 AgentExecutor（优先从构建器的执行器池复用）
         3. 绑定 onActivity 回调
         4. 运行子代理
         5. 封装并返回 ToolResult
         """
         self.started_at = datetime.now()
+        self._start_ns = time.perf_counter_ns()
         
         update_output(f"🚀 子代理启动: {self.definition.name}...")
         
         if self._on_activity:
             self._on_activity(f"子代理 {self.definition.name} 开始执行任务: {self.task}")
         
+        executor = None
         try:
-            # 延迟导入避免循环依赖
-            from .executor import AgentExecutor
-            
-            # 创建子代理执行器
-            executor = AgentExecutor(
-                agent_def=self.definition,
-                config=self.config,
-            )
+            if self._builder is not None:
+                executor = self._builder.acquire(self.definition)
+            else:
+                # 延迟导入避免循环依赖
+                from .executor import AgentExecutor
+                executor = AgentExecutor(
+                    agent_def=self.definition,
+                    config=self.config,
+                )
             
             # 绑定活动回调
             def handle_stream_event(event: StreamEvent):
@@ -145,7 +182,7 @@ class SubagentInvocation:
                 abort_signal=abort_signal,
             )
             
-            self.completed_at = datetime.now()
+            self._mark_completed()
             
             # 封装结果
             return ToolResult(
@@ -164,7 +201,7 @@ class SubagentInvocation:
             )
             
         except asyncio.CancelledError:
-            self.completed_at = datetime.now()
+            self._mark_completed()
             update_output(f"⚠️ 子代理 {self.definition.name} 被取消")
             
             return ToolResult.error_result(
@@ -174,7 +211,7 @@ class SubagentInvocation:
             )
             
         except Exception as e:
-            self.completed_at = datetime.now()
+            self._mark_completed()
             logger.error(f"[SubagentInvocation] 执行失败: {e}")
             update_output(f"❌ 子代理 {self.definition.name} 执行失败: {e}")
             
@@ -183,6 +220,10 @@ class SubagentInvocation:
                 error=str(e),
                 display=f"❌ {self.definition.name} 失败: {e}",
             )
+        
+        finally:
+            if executor is not None and self._builder is not None:
+                self._builder.release(self.definition, executor)
     
     def _build_input(self) -> str:
         """构建子代理输入"""
@@ -195,23 +236,19 @@ class SubagentInvocation:
     
     def _format_context(self) -> str:
         """格式化上下文"""
-        lines = []
-        for key, value in self.context.items():
-            if isinstance(value, dict):
-                lines.append(f"- {key}:")
-                for k, v in value.items():
-                    lines.append(f"  - {k}: {v}")
-            elif isinstance(value, list):
-                lines.append(f"- {key}: {', '.join(str(v) for v in value)}")
-            else:
-                lines.append(f"- {key}: {value}")
-        return "\n".join(lines)
+        return "\n".join(
+            _render_context_item(key, value) for key, value in self.context.items()
+        )
+    
+    def _mark_completed(self) -> None:
+        """记录完成时间"""
+        self._end_ns = time.perf_counter_ns()
+        self.completed_at = datetime.now()
     
     def _get_duration_ms(self) -> Optional[float]:
-        """获取执行时长（毫秒）"""
-        if self.started_at and self.completed_at:
-            delta = self.completed_at - self.started_at
-            return delta.total_seconds() * 1000
+        """获取执行时长（毫秒，单调时钟）"""
+        if self._start_ns is not None and self._end_ns is not None:
+            return (self._end_ns - self._start_ns) / 1_000_000
         return None
 
 
@@ -221,6 +258,42 @@ class SubagentInvocationBuilder:
     def __init__(self, config: Config):
         self.config = config
         self._registry = get_agent_registry()
+        # 空闲执行器池（代理名 -> 执行器列表），避免每次调用重复初始化
+        self._executor_pool: Dict[str, List["AgentExecutor"]] = {}
+        self._pool_version = config.get_version()
+    
+    def _check_pool_version(self) -> None:
+        """模型等配置变更后清空执行器池"""
+        version = self.config.get_version()
+        if version != self._pool_version:
+            self._executor_pool.clear()
+            self._pool_version = version
+    
+    def acquire(self, definition: AgentDefinition) -> "AgentExecutor":
+        """从池中取出执行器，没有可用的则新建"""
+        self._check_pool_version()
+        pool = self._executor_pool.get(definition.name)
+        while pool:
+            executor = pool.pop()
+            if executor.agent_def is definition:
+                return executor
+        
+        # 延迟导入避免循环依赖
+        from .executor import AgentExecutor
+        return AgentExecutor(agent_def=definition, config=self.config)
+    
+    def release(self, definition: AgentDefinition, executor: "AgentExecutor") -> None:
+        """重置执行器并放回池中"""
+        self._check_pool_version()
+        if executor.agent_def is not definition or executor.config_version != self._pool_version:
+            return
+        try:
+            executor.reset()
+        except RuntimeError:
+            return
+        pool = self._executor_pool.setdefault(definition.name, [])
+        if len(pool) < EXECUTOR_POOL_SIZE:
+            pool.append(executor)
     
     def build(
         self,
@@ -242,6 +315,7 @@ class SubagentInvocationBuilder:
             task=task,
             context=context,
             parent_task_id=parent_task_id,
+            builder=self,
         )
     
     def build_from_tool_call(
@@ -5,17 +5,93 @@ LLM 具体实现模块
 """
 
 import asyncio
+import itertools
 import json
-from typing import Optional, Dict, List, Any, AsyncGenerator
+import weakref
+from typing import Optional, Dict, List, Any, AsyncGenerator, Tuple, Callable
 from dataclasses import dataclass
 import logging
 
-from .basellm import BaseLLM, StreamEvent, StreamEventType, LLMResponse
+from .basellm import BaseLLM, StreamEvent, StreamEventType, LLMResponse, cached_llm
 from core.schema import ToolCallRequest, ThoughtSummary
 from core.config import LLMSettings, ModelConfig, LLMProvider
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
+
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
 logger = logging.getLogger(__name__)
 
+# 工具参数解析（orjson.JSONDecodeError 是 json.JSONDecodeError 的子类）
+_json_loads = orjson.loads if HAS_ORJSON else json.loads
+
+# 共享 HTTP 连接池参数：保留较多空闲连接并延长保活，突发请求无需重新握手
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE = 32
+HTTP_KEEPALIVE_EXPIRY = 90.0
+
+# 共享的异步 SDK 客户端（各自持有 HTTP 连接池），按事件循环和连接参数复用，
+# 协调代理与子代理的请求共用连接，避免重复握手
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _shared_async_client(key: Tuple, factory: Callable[[], Any]) -> Any:
+    """获取当前事件循环上共享的异步客户端，不存在时创建"""
+    try:
+        loop = asyncio.get_running_loop()
+        clients = _async_clients.get(loop)
+        if clients is None:
+            clients = _async_clients[loop] = {}
+    except (RuntimeError, TypeError):
+        # 不在事件循环中，或事件循环不支持弱引用
+        return factory()
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = factory()
+    return client
+
+
+def _http_client(settings: LLMSettings) -> Any:
+    """创建 SDK 共用的 httpx 异步客户端（已安装 h2 时启用 HTTP/2）"""
+    import httpx
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=HAS_H2,
+        timeout=settings.request_timeout,
+        follow_redirects=True,
+    )
+
+
+def _parse_tool_call(call_id: str, name: str, raw: Optional[str]) -> Optional[ToolCallRequest]:
+    """解析工具调用参数，无法解析时记录错误并返回 None（不以空参数执行）"""
+    try:
+        args = _json_loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        logger.error("工具参数解析失败: %s", raw)
+        return None
+    return ToolCallRequest(call_id=call_id, name=name, args=args)
+
+
+def _tool_call_event(call_id: str, name: str, fragments: List[str]) -> Optional[StreamEvent]:
+    """拼接流式参数片段并生成工具调用事件，参数无法解析时返回 None"""
+    call = _parse_tool_call(call_id, name, "".join(fragments))
+    return StreamEvent.tool(call) if call else None
+
 
 class OpenAILLM(BaseLLM):
     """OpenAI LLM 实现"""
@@ -48,15 +124,22 @@ class OpenAILLM(BaseLLM):
         if self._async_client is None:
             try:
                 from openai import AsyncOpenAI
-                self._async_client = AsyncOpenAI(
-                    api_key=self.settings.openai_api_key,
-                    base_url=self.settings.openai_api_base,
-                    timeout=self.settings.request_timeout,
-                )
             except ImportError:
                 raise ImportError("请安装 openai: pip install openai")
+            settings = self.settings
+            self._async_client = _shared_async_client(
+                ("openai", settings.openai_api_key, settings.openai_api_base,
+                 settings.request_timeout),
+                lambda: AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    base_url=settings.openai_api_base,
+                    timeout=settings.request_timeout,
+                    http_client=_http_client(settings),
+                ),
+            )
         return self._async_client
     
+    @cached_llm
     async def generate(
         self,
         messages: List[Dict[str, Any]],
@@ -84,6 +167,7 @@ class OpenAILLM(BaseLLM):
             logger.error(f"OpenAI 请求失败: {e}")
             raise
     
+    @cached_llm
     async def generate_stream(
         self,
         messages: List[Dict[str, Any]],
@@ -109,6 +193,7 @@ class OpenAILLM(BaseLLM):
         try:
             stream = await client.chat.completions.create(**request_params)
             
+            # 进行中的工具调用（序号 -> id/name/参数片段）
             current_tool_calls: Dict[int, Dict[str, Any]] = {}
             
             async for chunk in stream:
@@ -131,35 +216,37 @@ class OpenAILLM(BaseLLM):
                 if delta.tool_calls:
                     for tool_call in delta.tool_calls:
                         idx = tool_call.index
+                        tc = current_tool_calls.get(idx)
                         
-                        if idx not in current_tool_calls:
-                            current_tool_calls[idx] = {
+                        if tc is None:
+                            # 工具调用按序号依次流出，新序号出现时之前的调用已完整，
+                            # 立即发送而不必等到流结束
+                            for prev in current_tool_calls.values():
+                                event = _tool_call_event(prev["id"], prev["name"], prev["arguments"])
+                                if event:
+                                    yield event
+                            current_tool_calls.clear()
+                            tc = current_tool_calls[idx] = {
                                 "id": "",
                                 "name": "",
-                                "arguments": "",
+                                "arguments": [],
                             }
                         
                         if tool_call.id:
-                            current_tool_calls[idx]["id"] = tool_call.id
+                            tc["id"] = tool_call.id
                         if tool_call.function:
                             if tool_call.function.name:
-                                current_tool_calls[idx]["name"] = tool_call.function.name
+                                tc["name"] = tool_call.function.name
                             if tool_call.function.arguments:
-                                current_tool_calls[idx]["arguments"] += tool_call.function.arguments
+                                tc["arguments"].append(tool_call.function.arguments)
                 
                 # 检查结束
                 if choice.finish_reason:
-                    # 发送完成的工具调用
+                    # 发送剩余的工具调用
                     for tc in current_tool_calls.values():
-                        try:
-                            args = json.loads(tc["arguments"]) if tc["arguments"] else {}
-                            yield StreamEvent.tool(ToolCallRequest(
-                                call_id=tc["id"],
-                                name=tc["name"],
-                                args=args,
-                            ))
-                        except json.JSONDecodeError:
-                            logger.error(f"工具参数解析失败: {tc['arguments']}")
+                        event = _tool_call_event(tc["id"], tc["name"], tc["arguments"])
+                        if event:
+                            yield event
                     
                     yield StreamEvent.finish()
                     return
@@ -173,28 +260,22 @@ class OpenAILLM(BaseLLM):
         choice = response.choices[0]
         message = choice.message
         
-        tool_calls = []
-        if message.tool_calls:
-            for tc in message.tool_calls:
-                try:
-                    args = json.loads(tc.function.arguments) if tc.function.arguments else {}
-                    tool_calls.append(ToolCallRequest(
-                        call_id=tc.id,
-                        name=tc.function.name,
-                        args=args,
-                    ))
-                except json.JSONDecodeError:
-                    logger.error(f"工具参数解析失败: {tc.function.arguments}")
+        tool_calls = [
+            call
+            for tc in message.tool_calls or ()
+            if (call := _parse_tool_call(tc.id, tc.function.name, tc.function.arguments))
+        ]
         
+        usage = response.usage
         return LLMResponse(
             content=message.content or "",
             tool_calls=tool_calls,
             finish_reason=choice.finish_reason,
             usage={
-                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
-                "completion_tokens": response.usage.completion_tokens if response.usage else 0,
-                "total_tokens": response.usage.total_tokens if response.usage else 0,
-            },
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "total_tokens": usage.total_tokens,
+            } if usage else dict.fromkeys(("prompt_tokens", "completion_tokens", "total_tokens"), 0),
         )
 
 
@@ -208,20 +289,28 @@ class AnthropicLLM(BaseLLM):
     ):
         super().__init__(settings, model_config)
         self._client = None
+        # 最近一次转换的工具列表及其 Anthropic 格式（执行器每轮传入同一列表）
+        self._converted_tools: Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = None
     
     def _get_client(self):
         """获取 Anthropic 客户端"""
         if self._client is None:
             try:
                 from anthropic import AsyncAnthropic
-                self._client = AsyncAnthropic(
-                    api_key=self.settings.anthropic_api_key,
-                    timeout=self.settings.request_timeout,
-                )
             except ImportError:
                 raise ImportError("请安装 anthropic: pip install anthropic")
+            settings = self.settings
+            self._client = _shared_async_client(
+                ("anthropic", settings.anthropic_api_key, settings.request_timeout),
+                lambda: AsyncAnthropic(
+                    api_key=settings.anthropic_api_key,
+                    timeout=settings.request_timeout,
+                    http_client=_http_client(settings),
+                ),
+            )
         return self._client
     
+    @cached_llm
     async def generate(
         self,
         messages: List[Dict[str, Any]],
@@ -231,15 +320,7 @@ class AnthropicLLM(BaseLLM):
         """生成响应"""
         client = self._get_client()
         
-        # 分离系统消息和对话消息
-        system_prompt = ""
-        chat_messages = []
-        
-        for msg in messages:
-            if msg["role"] == "system":
-                system_prompt = msg["content"]
-            else:
-                chat_messages.append(msg)
+        system, chat_messages = self._split_system(messages)
         
         # 转换工具格式
         anthropic_tools = None
@@ -252,8 +333,8 @@ class AnthropicLLM(BaseLLM):
             "max_tokens": kwargs.get("max_tokens", self.model_config.max_tokens),
         }
         
-        if system_prompt:
-            request_params["system"] = system_prompt
+        if system:
+            request_params["system"] = system
         
         if anthropic_tools:
             request_params["tools"] = anthropic_tools
@@ -265,6 +346,7 @@ class AnthropicLLM(BaseLLM):
             logger.error(f"Anthropic 请求失败: {e}")
             raise
     
+    @cached_llm
     async def generate_stream(
         self,
         messages: List[Dict[str, Any]],
@@ -275,15 +357,7 @@ class AnthropicLLM(BaseLLM):
         """流式生成响应"""
         client = self._get_client()
         
-        # 分离系统消息
-        system_prompt = ""
-        chat_messages = []
-        
-        for msg in messages:
-            if msg["role"] == "system":
-                system_prompt = msg["content"]
-            else:
-                chat_messages.append(msg)
+        system, chat_messages = self._split_system(messages)
         
         anthropic_tools = None
         if tools:
@@ -296,8 +370,8 @@ class AnthropicLLM(BaseLLM):
             "stream": True,
         }
         
-        if system_prompt:
-            request_params["system"] = system_prompt
+        if system:
+            request_params["system"] = system
         
         if anthropic_tools:
             request_params["tools"] = anthropic_tools
@@ -317,7 +391,7 @@ class AnthropicLLM(BaseLLM):
                                 current_tool = {
                                     "id": event.content_block.id,
                                     "name": event.content_block.name,
-                                    "input": "",
+                                    "input": [],
                                 }
                     
                     elif event.type == "content_block_delta":
@@ -325,19 +399,15 @@ class AnthropicLLM(BaseLLM):
                             yield StreamEvent.text(event.delta.text)
                         elif hasattr(event.delta, "partial_json"):
                             if current_tool:
-                                current_tool["input"] += event.delta.partial_json
+                                current_tool["input"].append(event.delta.partial_json)
                     
                     elif event.type == "content_block_stop":
                         if current_tool:
-                            try:
-                                args = json.loads(current_tool["input"]) if current_tool["input"] else {}
-                                yield StreamEvent.tool(ToolCallRequest(
-                                    call_id=current_tool["id"],
-                                    name=current_tool["name"],
-                                    args=args,
-                                ))
-                            except json.JSONDecodeError:
-                                pass
+                            tool_event = _tool_call_event(
+                                current_tool["id"], current_tool["name"], current_tool["input"]
+                            )
+                            if tool_event:
+                                yield tool_event
                             current_tool = None
                     
                     elif event.type == "message_stop":
@@ -348,8 +418,36 @@ class AnthropicLLM(BaseLLM):
             logger.error(f"Anthropic 流式请求失败: {e}")
             yield StreamEvent.fail(str(e))
     
+    def _split_system(
+        self,
+        messages: List[Dict[str, Any]],
+    ) -> Tuple[Optional[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        分离系统消息和对话消息
+        
+        每条系统消息成为一个 system 文本块；启用提示缓存时在第一块（系统提示词）
+        上设置缓存断点，工具定义与系统提示词作为稳定前缀被服务端缓存。
+        """
+        system_blocks = []
+        chat_messages = []
+        for msg in messages:
+            if msg["role"] == "system":
+                system_blocks.append({"type": "text", "text": msg["content"]})
+            else:
+                chat_messages.append(msg)
+        
+        if not system_blocks:
+            return None, chat_messages
+        if self.settings.prompt_cache:
+            system_blocks[0]["cache_control"] = {"type": "ephemeral"}
+        return system_blocks, chat_messages
+    
     def _convert_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """转换工具格式为 Anthropic 格式"""
+        """转换工具格式为 Anthropic 格式（同一列表对象只转换一次）"""
+        cached = self._converted_tools
+        if cached is not None and cached[0] is tools:
+            return cached[1]
+        
         anthropic_tools = []
         for tool in tools:
             if tool.get("type") == "function":
@@ -359,16 +457,17 @@ class AnthropicLLM(BaseLLM):
                     "description": func.get("description", ""),
                     "input_schema": func.get("parameters", {"type": "object", "properties": {}}),
                 })
+        self._converted_tools = (tools, anthropic_tools)
         return anthropic_tools
     
     def _parse_response(self, response) -> LLMResponse:
         """解析响应"""
-        content = ""
+        texts = []
         tool_calls = []
         
         for block in response.content:
             if block.type == "text":
-                content += block.text
+                texts.append(block.text)
             elif block.type == "tool_use":
                 tool_calls.append(ToolCallRequest(
                     call_id=block.id,
@@ -376,14 +475,15 @@ class AnthropicLLM(BaseLLM):
                     args=block.input,
                 ))
         
+        usage = response.usage
         return LLMResponse(
-            content=content,
+            content="".join(texts),
             tool_calls=tool_calls,
             finish_reason=response.stop_reason or "end_turn",
             usage={
-                "prompt_tokens": response.usage.input_tokens if response.usage else 0,
-                "completion_tokens": response.usage.output_tokens if response.usage else 0,
-            },
+                "prompt_tokens": usage.input_tokens,
+                "completion_tokens": usage.output_tokens,
+            } if usage else dict.fromkeys(("prompt_tokens", "completion_tokens"), 0),
         )
 
 
@@ -395,10 +495,16 @@ class MockLLM(BaseLLM):
         settings: Optional[LLMSettings] = None,
         model_config: Optional[ModelConfig] = None,
         responses: Optional[List[str]] = None,
+        chunk_size: int = 16,
+        delay: float = 0.0,
     ):
         super().__init__(settings, model_config)
         self.responses = responses or ["这是一个模拟响应。"]
-        self._response_index = 0
+        # 循环取下一条响应
+        self._next_response = itertools.cycle(self.responses).__next__
+        # 流式输出的分块大小（字符）与块间延迟（秒）
+        self.chunk_size = max(1, chunk_size)
+        self.delay = delay
     
     async def generate(
         self,
@@ -406,11 +512,8 @@ class MockLLM(BaseLLM):
         tools: Optional[List[Dict[str, Any]]] = None,
         **kwargs,
     ) -> LLMResponse:
-        response = self.responses[self._response_index % len(self.responses)]
-        self._response_index += 1
-        
         return LLMResponse(
-            content=response,
+            content=self._next_response(),
             finish_reason="stop",
         )
     
@@ -421,15 +524,16 @@ class MockLLM(BaseLLM):
         abort_signal: Optional[asyncio.Event] = None,
         **kwargs,
     ) -> AsyncGenerator[StreamEvent, None]:
-        response = self.responses[self._response_index % len(self.responses)]
-        self._response_index += 1
+        response = self._next_response()
         
         # 模拟流式输出
-        for char in response:
+        chunk_size = self.chunk_size
+        for i in range(0, len(response), chunk_size):
             if abort_signal and abort_signal.is_set():
                 break
-            yield StreamEvent.text(char)
-            await asyncio.sleep(0.01)
+            yield StreamEvent.text(response[i:i + chunk_size])
+            if self.delay:
+                await asyncio.sleep(self.delay)
         
         yield StreamEvent.finish()
 
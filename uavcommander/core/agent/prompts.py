@@ -4,16 +4,17 @@ Prompt 模板管理模块
 管理系统中使用的各类提示词模板。
 """
 
-from typing import Optional, Dict, List, Any
-from dataclasses import dataclass
-from string import Template
+import re
+from typing import Optional, Dict, List, Any, Tuple
+from dataclasses import dataclass, field
 
 
 # ============================================================================
 # 协调器 Prompt
 # ============================================================================
 
-COORDINATOR_SYSTEM_PROMPT = """你是 UAV Commander 的主协调代理，负责理解用户的无人机控制意图并调度执行。
+# 静态前缀在前、动态状态在后：状态变化时前缀字节不变，可被服务端提示缓存复用
+COORDINATOR_STATIC_PREFIX = """你是 UAV Commander 的主协调代理，负责理解用户的无人机控制意图并调度执行。
 
 ## 角色定位
 你是一个专业的无人机集群控制专家，能够:
@@ -58,14 +59,25 @@ COORDINATOR_SYSTEM_PROMPT = """你是 UAV Commander 的主协调代理，负责
 - 调用工具后报告执行状态
 - 任务完成后总结结果
 - 遇到问题时清晰说明原因和建议
+"""
 
-## 当前状态
+COORDINATOR_DYNAMIC_SUFFIX = """## 当前状态
 {current_status}
 
 ## 可用无人机
 {available_uavs}
 """
 
+COORDINATOR_SYSTEM_PROMPT = COORDINATOR_STATIC_PREFIX + "\n" + COORDINATOR_DYNAMIC_SUFFIX
+
+
+def coordinator_dynamic_suffix(current_status: str, available_uavs: str) -> str:
+    """渲染协调器提示词的动态状态部分"""
+    return COORDINATOR_DYNAMIC_SUFFIX.format(
+        current_status=current_status,
+        available_uavs=available_uavs,
+    )
+
 
 # ============================================================================
 # 子代理 Prompts
@@ -247,22 +259,57 @@ FEW_SHOT_EXAMPLES = [
 
 @dataclass
 class PromptTemplate:
-    """Prompt 模板"""
+    """
+    Prompt 模板
+    
+    variables 中的变量在模板里写作 {name}（兼容 $name / ${name}），
+    其余花括号和 $ 原样保留；渲染时未提供的变量保留占位符。
+    """
     
     template: str
     variables: List[str]
+    # 预编译结果：字面量片段、变量名及其原始占位符（字面量比变量多一段）
+    _literals: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _names: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _placeholders: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        literals, names, placeholders = [], [], []
+        if self.variables:
+            alt = "|".join(re.escape(v) for v in self.variables)
+            pattern = re.compile(rf"\{{({alt})\}}|\$\{{({alt})\}}|\$({alt})(?!\w)")
+            pos = 0
+            for m in pattern.finditer(self.template):
+                literals.append(self.template[pos:m.start()])
+                names.append(m.group(1) or m.group(2) or m.group(3))
+                placeholders.append(m.group(0))
+                pos = m.end()
+            literals.append(self.template[pos:])
+        self._literals = tuple(literals)
+        self._names = tuple(names)
+        self._placeholders = tuple(placeholders)
     
     def render(self, **kwargs) -> str:
         """渲染模板"""
-        t = Template(self.template)
-        return t.safe_substitute(**kwargs)
+        if not self._names:
+            return self.template
+        parts = [self._literals[0]]
+        for name, placeholder, literal in zip(self._names, self._placeholders, self._literals[1:]):
+            parts.append(str(kwargs[name]) if name in kwargs else placeholder)
+            parts.append(literal)
+        return "".join(parts)
 
 
 class PromptManager:
     """Prompt 管理器"""
     
+    # 渲染结果缓存容量
+    RENDER_CACHE_SIZE = 128
+    
     def __init__(self):
         self._templates: Dict[str, PromptTemplate] = {}
+        # (模板名, 排序后的参数) -> 渲染结果，注册模板时清空
+        self._render_cache: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], str] = {}
         self._load_defaults()
     
     def _load_defaults(self) -> None:
@@ -289,15 +336,32 @@ class PromptManager:
         return self._templates.get(name)
     
     def render(self, name: str, **kwargs) -> str:
-        """渲染模板"""
+        """渲染模板（相同模板与参数复用渲染结果）"""
+        # 键中带上值类型：1、True、1.0 相等但渲染结果不同
+        key = (name, tuple((k, type(v), v) for k, v in sorted(kwargs.items())))
+        try:
+            cached = self._render_cache.get(key)
+        except TypeError:
+            # 参数不可哈希，直接渲染
+            key = None
+            cached = None
+        if cached is not None:
+            return cached
+        
         template = self.get(name)
-        if template:
-            return template.render(**kwargs)
-        return ""
+        if not template:
+            return ""
+        rendered = template.render(**kwargs)
+        if key is not None:
+            if len(self._render_cache) >= self.RENDER_CACHE_SIZE:
+                self._render_cache.clear()
+            self._render_cache[key] = rendered
+        return rendered
     
     def register(self, name: str, template: str, variables: List[str]) -> None:
         """注册模板"""
         self._templates[name] = PromptTemplate(template, variables)
+        self._render_cache.clear()
     
     def get_tool_description(self, tool_name: str) -> str:
         """获取工具描述"""
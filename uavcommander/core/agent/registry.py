@@ -13,6 +13,9 @@ from core.schema import ToolSchema
 
 logger = logging.getLogger(__name__)
 
+# 状态摘要中描述的截断长度
+SHORT_DESCRIPTION_LENGTH = 40
+
 
 class AgentType(Enum):
     """Agent 类型"""
@@ -55,6 +58,9 @@ class AgentDefinition:
     # 可用工具
     tools: List[str] = field(default_factory=list)
     
+    # 无副作用的工具：参数相同的并发调用共享一次执行结果
+    pure_tools: List[str] = field(default_factory=list)
+    
     # 能力列表
     capabilities: List[AgentCapability] = field(default_factory=list)
     
@@ -91,6 +97,7 @@ class AgentDefinition:
             "agent_type": self.agent_type.value,
             "system_prompt": self.system_prompt,
             "tools": self.tools,
+            "pure_tools": self.pure_tools,
             "capabilities": [c.value for c in self.capabilities],
             "model": self.model,
             "max_turns": self.max_turns,
@@ -99,6 +106,20 @@ class AgentDefinition:
         }
 
 
+# 只读查询类工具方法（无副作用，可共享并发调用的执行结果）
+READ_ONLY_TOOL_METHODS = (
+    "device_tool.get_status",
+    "device_tool.get_position",
+    "device_tool.get_battery",
+    "swarm_tool.get_swarm_status",
+)
+
+
+def _read_only_methods(tools: List[str]) -> List[str]:
+    """从可用工具中挑出只读查询方法"""
+    return [m for m in READ_ONLY_TOOL_METHODS if m.split(".", 1)[0] in tools]
+
+
 # 预定义 Agent
 PREDEFINED_AGENTS: Dict[str, AgentDefinition] = {
     "coordinator": AgentDefinition(
@@ -107,6 +128,7 @@ PREDEFINED_AGENTS: Dict[str, AgentDefinition] = {
         agent_type=AgentType.COORDINATOR,
         system_prompt="你是 UAV Commander 的主协调代理，负责理解用户的无人机控制意图并调度执行。",
         tools=["formation_agent", "navigation_agent", "search_agent", "device_tool", "swarm_tool"],
+        pure_tools=_read_only_methods(["formation_agent", "navigation_agent", "search_agent", "device_tool", "swarm_tool"]),
         capabilities=[
             AgentCapability.CHAT,
             AgentCapability.TOOL_USE,
@@ -128,6 +150,7 @@ PREDEFINED_AGENTS: Dict[str, AgentDefinition] = {
 可用工具：swarm_tool.form_formation, device_tool.goto, device_tool.get_status
 """,
         tools=["swarm_tool", "device_tool"],
+        pure_tools=_read_only_methods(["swarm_tool", "device_tool"]),
         capabilities=[
             AgentCapability.TOOL_USE,
             AgentCapability.FORMATION,
@@ -147,6 +170,7 @@ PREDEFINED_AGENTS: Dict[str, AgentDefinition] = {
 可用工具：device_tool.goto, device_tool.get_position, safety_tool.check_geofence
 """,
         tools=["device_tool", "safety_tool"],
+        pure_tools=_read_only_methods(["device_tool", "safety_tool"]),
         capabilities=[
             AgentCapability.TOOL_USE,
             AgentCapability.NAVIGATION,
@@ -166,6 +190,7 @@ PREDEFINED_AGENTS: Dict[str, AgentDefinition] = {
 可用工具：device_tool.goto, swarm_tool.assign_task
 """,
         tools=["device_tool", "swarm_tool"],
+        pure_tools=_read_only_methods(["device_tool", "swarm_tool"]),
         capabilities=[
             AgentCapability.TOOL_USE,
             AgentCapability.SEARCH,
@@ -180,22 +205,63 @@ class AgentRegistry:
     
     def __init__(self):
         self._agents: Dict[str, AgentDefinition] = {}
+        self._short_descriptions: Dict[str, str] = {}  # 注册时截断好的描述
+        self._version = 0  # 注册表变更计数，供调用方做缓存失效
+        # 按类型 / 能力的索引（名称 -> 定义，保持注册顺序），注册/注销时维护
+        self._by_type: Dict[AgentType, Dict[str, AgentDefinition]] = {}
+        self._by_capability: Dict[AgentCapability, Dict[str, AgentDefinition]] = {}
+        # 子代理工具 Schema 缓存，注册/注销时失效
+        self._subagent_tools: Optional[List[ToolSchema]] = None
         self._load_predefined()
     
+    @property
+    def version(self) -> int:
+        """注册表版本号（每次注册/注销时递增）"""
+        return self._version
+    
     def _load_predefined(self) -> None:
         """加载预定义 Agent"""
-        for name, definition in PREDEFINED_AGENTS.items():
-            self._agents[name] = definition
+        self._agents.update(PREDEFINED_AGENTS)
+        self._short_descriptions.update(
+            (name, definition.description[:SHORT_DESCRIPTION_LENGTH])
+            for name, definition in PREDEFINED_AGENTS.items()
+        )
+        for definition in PREDEFINED_AGENTS.values():
+            self._index(definition)
+    
+    def _index(self, definition: AgentDefinition) -> None:
+        """将定义加入类型与能力索引"""
+        name = definition.name
+        self._by_type.setdefault(definition.agent_type, {})[name] = definition
+        for capability in definition.capabilities:
+            self._by_capability.setdefault(capability, {})[name] = definition
+    
+    def _unindex(self, definition: AgentDefinition) -> None:
+        """将定义移出类型与能力索引"""
+        name = definition.name
+        self._by_type.get(definition.agent_type, {}).pop(name, None)
+        for capability in definition.capabilities:
+            self._by_capability.get(capability, {}).pop(name, None)
     
     def register(self, definition: AgentDefinition) -> None:
         """注册 Agent"""
+        previous = self._agents.get(definition.name)
+        if previous is not None:
+            self._unindex(previous)
         self._agents[definition.name] = definition
+        self._short_descriptions[definition.name] = definition.description[:SHORT_DESCRIPTION_LENGTH]
+        self._index(definition)
+        self._subagent_tools = None
+        self._version += 1
         logger.info(f"[AgentRegistry] 注册 Agent: {definition.name}")
     
     def unregister(self, name: str) -> bool:
         """注销 Agent"""
         if name in self._agents:
-            del self._agents[name]
+            self._unindex(self._agents.pop(name))
+            self._short_descriptions.pop(name, None)
+            self._subagent_tools = None
+            self._version += 1
             logger.info(f"[AgentRegistry] 注销 Agent: {name}")
             return True
         return False
@@ -204,31 +270,29 @@ class AgentRegistry:
         """获取 Agent 定义"""
         return self._agents.get(name)
     
+    def get_short_description(self, name: str) -> str:
+        """获取注册时截断好的 Agent 描述"""
+        return self._short_descriptions.get(name, "")
+    
     def list_agents(self) -> List[str]:
         """列出所有 Agent 名称"""
         return list(self._agents.keys())
     
     def list_by_type(self, agent_type: AgentType) -> List[AgentDefinition]:
         """按类型列出 Agent"""
-        return [
-            agent for agent in self._agents.values()
-            if agent.agent_type == agent_type
-        ]
+        return list(self._by_type.get(agent_type, {}).values())
     
     def list_by_capability(self, capability: AgentCapability) -> List[AgentDefinition]:
         """按能力列出 Agent"""
-        return [
-            agent for agent in self._agents.values()
-            if capability in agent.capabilities
-        ]
+        return list(self._by_capability.get(capability, {}).values())
     
     def get_subagent_tools(self) -> List[ToolSchema]:
-        """获取所有子代理作为工具的 Schema"""
-        tools = []
-        for agent in self._agents.values():
-            if agent.agent_type == AgentType.SPECIALIST:
-                tools.append(agent.to_tool_schema())
-        return tools
+        """获取所有子代理作为工具的 Schema（注册表变更前复用）"""
+        if self._subagent_tools is None:
+            self._subagent_tools = [
+                agent.to_tool_schema() for agent in self.list_by_type(AgentType.SPECIALIST)
+            ]
+        return list(self._subagent_tools)
     
     def to_dict(self) -> Dict[str, Dict[str, Any]]:
         """序列化为字典"""
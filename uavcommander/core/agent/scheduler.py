@@ -72,7 +72,7 @@ class CoreToolScheduler:
         output_update_handler: OutputUpdateHandler,
         on_tool_calls_update: ToolCallsUpdateHandler,
         on_all_tool_calls_complete: AllToolCallsCompleteHandler,
-        tool_executor: Optional[Callable[[str, Dict[str, Any]], Awaitable[ToolResult]]] = None,
+        tool_executor: Optional[Callable[[str, Dict[str, Any], str], Awaitable[ToolResult]]] = None,
         scheduler_config: Optional[SchedulerConfig] = None,
     ):
         self.config = config
@@ -99,7 +99,7 @@ class CoreToolScheduler:
         self,
         requests: List[ToolCallRequest],
         abort_signal: asyncio.Event,
-    ) -> None:
+    ) -> List[CompletedToolCall]:
         """
         调度一批工具调用
         
@@ -107,9 +107,12 @@ class CoreToolScheduler:
         2. 检查是否需要确认
         3. 执行工具
         4. 收集结果
+        
+        Returns:
+            按请求顺序排列的已完成调用（无结果的调用不包含在内）
         """
         if not requests:
-            return
+            return []
         
         logger.info(f"[Scheduler] 调度 {len(requests)} 个工具调用")
         
@@ -134,10 +137,14 @@ class CoreToolScheduler:
             )
             tasks.append(task)
         
-        # 等待所有任务完成
-        completed_calls = []
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 等待所有任务完成；中断时 schedule() 在此被取消，也要清理待处理调用
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for tool_call in tool_calls:
+                self._pending_calls.pop(tool_call.request.call_id, None)
         
+        completed_calls = []
         for tool_call, result in zip(tool_calls, results):
             if isinstance(result, Exception):
                 logger.error(f"[Scheduler] 工具 {tool_call.request.name} 执行异常: {result}")
@@ -152,14 +159,12 @@ class CoreToolScheduler:
                     request=tool_call.request,
                     result=tool_call.result,
                 ))
-            
-            # 清理
-            if tool_call.request.call_id in self._pending_calls:
-                del self._pending_calls[tool_call.request.call_id]
         
         # 通知完成
         if completed_calls:
             await self._on_all_tool_calls_complete(completed_calls)
+        
+        return completed_calls
     
     async def _execute_tool_call(
         self,
@@ -314,7 +319,7 @@ class CoreToolScheduler:
                 # 执行工具
                 if self._tool_executor:
                     result = await asyncio.wait_for(
-                        self._tool_executor(request.name, request.args),
+                        self._tool_executor(request.name, request.args, request.call_id),
                         timeout=self.scheduler_config.default_timeout
                     )
                 else:
@@ -179,6 +179,14 @@ class LLMSettings:
     # 流式配置
     stream_chunk_size: int = 1024
     
+    # 响应缓存容量（相同请求直接返回缓存结果，0 表示不缓存）
+    response_cache_size: int = 0
+    # 响应缓存有效期（秒，0 表示不过期）
+    response_cache_ttl: float = 1800.0
+    
+    # 是否为系统提示词请求服务端提示缓存（Anthropic cache_control）
+    prompt_cache: bool = True
+    
     # 模型配置覆盖
     model_overrides: Dict[str, Dict[str, Any]] = field(default_factory=dict)
     
@@ -230,5 +238,8 @@ class LLMSettings:
             default_model=os.getenv("UAV_DEFAULT_MODEL", "gpt-4"),
             request_timeout=float(os.getenv("UAV_LLM_TIMEOUT", "120.0")),
             max_retries=int(os.getenv("UAV_LLM_MAX_RETRIES", "3")),
+            response_cache_size=int(os.getenv("UAV_LLM_RESPONSE_CACHE", "0")),
+            response_cache_ttl=float(os.getenv("UAV_LLM_RESPONSE_CACHE_TTL", "1800")),
+            prompt_cache=os.getenv("UAV_LLM_PROMPT_CACHE", "1") != "0",
         )
 
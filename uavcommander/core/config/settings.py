@@ -90,16 +90,25 @@ class Config:
     # 运行时配置
     _model: str = "gpt-4"
     _user_tier: Optional[str] = None
+    _version: int = 0  # 模型/审批模式变更计数，供状态显示做缓存失效
+    
+    def get_version(self) -> int:
+        return self._version
     
     def get_model(self) -> str:
         return self._model
     
     def set_model(self, model: str) -> None:
         self._model = model
+        self._version += 1
     
     def get_approval_mode(self) -> ApprovalMode:
         return self.system.approval_mode
     
+    def set_approval_mode(self, mode: ApprovalMode) -> None:
+        self.system.approval_mode = mode
+        self._version += 1
+    
     def get_user_tier(self) -> Optional[str]:
         return self._user_tier
     
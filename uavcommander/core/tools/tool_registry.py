@@ -13,6 +13,9 @@ from .tools import DeclarativeTool, ToolInvocation, ToolCategory
 
 logger = logging.getLogger(__name__)
 
+# 状态摘要中描述的截断长度
+SHORT_DESCRIPTION_LENGTH = 40
+
 
 @dataclass
 class ToolRegistration:
@@ -22,6 +25,7 @@ class ToolRegistration:
     enabled: bool = True
     priority: int = 0
     server_name: Optional[str] = None  # MCP 服务器名称
+    description_short: str = ""  # 注册时截断好的描述，用于状态摘要
 
 
 class ToolRegistry:
@@ -38,6 +42,12 @@ class ToolRegistry:
         self._tools: Dict[str, ToolRegistration] = {}
         self._category_index: Dict[ToolCategory, List[str]] = {}
         self._server_index: Dict[str, List[str]] = {}
+        self._version = 0  # 注册表变更计数，供调用方做缓存失效
+    
+    @property
+    def version(self) -> int:
+        """注册表版本号（每次注册/注销/启用/禁用时递增）"""
+        return self._version
     
     def register(
         self,
@@ -52,6 +62,7 @@ class ToolRegistry:
             enabled=enabled,
             priority=priority,
             server_name=server_name,
+            description_short=tool.description[:SHORT_DESCRIPTION_LENGTH],
         )
         
         self._tools[tool.name] = registration
@@ -67,6 +78,7 @@ class ToolRegistry:
                 self._server_index[server_name] = []
             self._server_index[server_name].append(tool.name)
         
+        self._version += 1
         logger.info(f"[ToolRegistry] 注册工具: {tool.name}")
     
     def unregister(self, name: str) -> bool:
@@ -84,6 +96,7 @@ class ToolRegistry:
         if registration.server_name in self._server_index:
             self._server_index[registration.server_name].remove(name)
         
+        self._version += 1
         logger.info(f"[ToolRegistry] 注销工具: {name}")
         return True
     
@@ -94,6 +107,11 @@ class ToolRegistry:
             return registration.tool
         return None
     
+    def get_short_description(self, name: str) -> str:
+        """获取注册时截断好的工具描述"""
+        registration = self._tools.get(name)
+        return registration.description_short if registration else ""
+    
     def get_by_full_name(self, full_name: str) -> Optional[DeclarativeTool]:
         """
         通过完整名称获取工具
@@ -158,6 +176,7 @@ class ToolRegistry:
         """启用工具"""
         if name in self._tools:
             self._tools[name].enabled = True
+            self._version += 1
             return True
         return False
     
@@ -165,6 +184,7 @@ class ToolRegistry:
         """禁用工具"""
         if name in self._tools:
             self._tools[name].enabled = False
+            self._version += 1
             return True
         return False
     
@@ -4,20 +4,33 @@ Agent 模块测试
 
 import pytest
 import asyncio
+from types import SimpleNamespace
 
 from core.agent import (
     Context,
     ContextConfig,
+    ContextManager,
     AgentRegistry,
     AgentDefinition,
     AgentType,
     AgentCapability,
     get_agent_registry,
     MockLLM,
+    LLMResponse,
     StreamEvent,
     StreamEventType,
+    cached_llm,
+    AgentExecutor,
+    ExecutorConfig,
+    SubagentInvocationBuilder,
+    OpenAILLM,
+    COORDINATOR_STATIC_PREFIX,
+    coordinator_dynamic_suffix,
+    PromptTemplate,
+    PromptManager,
 )
-from core.schema import Message, MessageRole
+from core.config import LLMSettings
+from core.schema import Message, MessageRole, ToolCallRequest, ToolResult
 
 
 class TestContext:
@@ -64,6 +77,165 @@ class TestContext:
         assert len(messages) == 2
         assert messages[0]["role"] == "user"
         assert messages[1]["role"] == "assistant"
+    
+    def test_llm_messages_stable_prefix(self):
+        """测试系统提示词与摘要位于消息前缀"""
+        context = Context(config=ContextConfig(compress_threshold=200, preserve_recent=1))
+        for i in range(3):
+            context.add_user_message(f"长消息 {i} " + "x" * 400)
+        
+        messages = context.get_llm_messages("系统提示")
+        assert messages[0] == {"role": "system", "content": "系统提示"}
+        assert messages[1]["content"].startswith("[历史摘要]")
+        assert messages[-1]["role"] == "user"
+    
+    def test_state_prompt_after_static_prefix(self, test_config):
+        """测试协调器动态状态位于静态系统提示词之后"""
+        definition = AgentDefinition(name="coordinator", description="测试")
+        executor = AgentExecutor(definition, config=test_config, llm=MockLLM())
+        executor.set_state_prompt(coordinator_dynamic_suffix("正常", "uav_1"))
+        executor.context.add_user_message("起飞")
+        
+        messages = executor.context.get_llm_messages(
+            executor.llm.system_prompt, executor._state_prompt
+        )
+        assert messages[0]["content"] == COORDINATOR_STATIC_PREFIX
+        assert messages[1]["content"].startswith("## 当前状态\n正常")
+        assert messages[2] == {"role": "user", "content": "起飞"}
+    
+    def test_llm_messages_track_mutations(self):
+        """测试增量维护的 LLM 消息与压缩、归档、外部修改保持一致"""
+        context = Context(config=ContextConfig(
+            compress_threshold=300, preserve_recent=4, archive_after=3, archive_keep_recent=1,
+        ))
+        for i in range(12):
+            context.add_user_message(f"消息 {i} " + "x" * 80)
+            context.evict()
+            expected = [{"role": m.role.value, "content": m.text_content} for m in context.messages]
+            assert context.get_llm_messages()[-len(expected):] == expected
+        
+        context.messages.append(Message.user_message("外部追加"))
+        assert context.get_llm_messages()[-1]["content"] == "外部追加"
+    
+    def test_compress_keeps_token_count(self):
+        """测试压缩后 token 计数与保留消息一致"""
+        context = Context(config=ContextConfig(compress_threshold=50, preserve_recent=2))
+        
+        for i in range(10):
+            context.add_user_message(f"消息 {i} " + "x" * 40)
+        
+        expected = sum(context._estimate_tokens(m) for m in context.messages)
+        assert context._token_count == expected
+        assert context.message_count <= 10
+    
+    def test_content_hash(self):
+        """测试内容哈希随消息变化"""
+        context = Context(context_id="hash")
+        context.add_user_message("Hello")
+        first = context.content_hash()
+        
+        other = Context(context_id="hash")
+        other.add_user_message("Hello")
+        assert other.content_hash() == first
+        
+        context.add_assistant_message("Hi")
+        assert context.content_hash() != first
+    
+    def test_dict_round_trip(self):
+        """测试序列化往返保留消息内容"""
+        context = Context()
+        context.add_user_message("Hello")
+        context.add_assistant_message("Hi there!")
+        
+        restored = Context.from_dict(context.to_dict())
+        assert [m.text_content for m in restored.messages] == ["Hello", "Hi there!"]
+        assert [m.role for m in restored.messages] == [MessageRole.USER, MessageRole.ASSISTANT]
+        assert restored.messages[0].message_id == context.messages[0].message_id
+        assert restored._token_count == context._token_count
+    
+    def test_compress_skipped_without_gain(self):
+        """测试摘要无法减少 token 时跳过压缩并上调阈值"""
+        config = ContextConfig(max_tokens=100, compress_threshold=20, preserve_recent=2)
+        context = Context(config=config)
+        
+        for i in range(4):
+            context.add_user_message(f"短消息 {i} " + "x" * 20)
+        assert context.message_count == 4
+        assert context._compress_threshold > config.compress_threshold
+        
+        context = Context(config=config)
+        for i in range(4):
+            context.add_user_message(f"长消息 {i} " + "x" * 400)
+        assert context.message_count < 4
+    
+    @pytest.mark.asyncio
+    async def test_async_summarizer(self):
+        """测试异步摘要替换截断摘要"""
+        async def summarize(messages):
+            await asyncio.sleep(0)
+            return f"摘要 {len(messages)} 条"
+        
+        context = Context(config=ContextConfig(compress_threshold=200, preserve_recent=1))
+        context.set_summarizer(summarize)
+        for i in range(3):
+            context.add_user_message(f"长消息 {i} " + "x" * 400)
+        
+        assert context._summaries
+        await context.wait_summaries()
+        assert context._summaries[0].summary.startswith("摘要")
+    
+    @pytest.mark.asyncio
+    async def test_executor_llm_summary_flag(self, test_config):
+        """测试 llm_summary 开启时执行器用自身 LLM 生成摘要"""
+        definition = AgentDefinition(name="summary", description="测试")
+        default = AgentExecutor(definition, config=test_config, llm=MockLLM())
+        assert default.context._summarizer is None
+        
+        executor_config = ExecutorConfig(context=ContextConfig(
+            compress_threshold=200, preserve_recent=1, llm_summary=True,
+        ))
+        executor = AgentExecutor(
+            definition, config=test_config, executor_config=executor_config,
+            llm=MockLLM(responses=["LLM 摘要"]),
+        )
+        for i in range(3):
+            executor.context.add_user_message(f"长消息 {i} " + "x" * 400)
+        
+        await executor.context.wait_summaries()
+        assert executor.context._summaries[0].summary == "LLM 摘要"
+    
+    def test_evict_archives_old_messages(self):
+        """测试归档旧消息正文并保持消息条数"""
+        config = ContextConfig(auto_compress=False, archive_after=6, archive_keep_recent=2)
+        context = Context(config=config)
+        for i in range(6):
+            context.add_user_message(f"消息 {i} " + "x" * 40)
+        assert context.evict() == 0
+        
+        context.add_user_message("消息 6")
+        assert context.evict() > 0
+        texts = [m.text_content for m in context.messages]
+        assert texts[:5] == ["[archived]"] * 5
+        assert texts[5:] == ["消息 5 " + "x" * 40, "消息 6"]
+        assert context._token_count == sum(context._estimate_tokens(m) for m in context.messages)
+        
+        # 幂等：未超过阈值时不再改动
+        assert context.evict() == 0
+    
+    def test_context_manager_evicts_unreferenced(self):
+        """测试上下文管理器淘汰最久未用且无外部引用的上下文"""
+        manager = ContextManager(max_contexts=2)
+        kept = manager.create("a")
+        manager.create("b")
+        manager.create("c")
+        
+        # "a" 已被挤出 LRU，但仍被外部引用
+        assert manager.get("a") is kept
+        # "b" 既被淘汰又无外部引用，已被回收
+        assert manager.get("b") is None
+        assert manager.get_or_create("c").context_id == "c"
+        assert manager.delete("c")
+        assert manager.list_contexts() == ["a"]
 
 
 class TestAgentRegistry:
@@ -109,6 +281,58 @@ class TestAgentRegistry:
         
         for agent in specialists:
             assert agent.agent_type == AgentType.SPECIALIST
+    
+    def test_indexes_follow_registration(self):
+        """测试类型/能力索引与子代理工具缓存随注册、覆盖、注销更新"""
+        registry = AgentRegistry()
+        tool_count = len(registry.get_subagent_tools())
+        
+        registry.register(AgentDefinition(
+            name="scout_agent",
+            description="侦察",
+            agent_type=AgentType.SPECIALIST,
+            capabilities=[AgentCapability.PLANNING],
+        ))
+        assert len(registry.get_subagent_tools()) == tool_count + 1
+        assert "scout_agent" in [a.name for a in registry.list_by_capability(AgentCapability.PLANNING)]
+        
+        registry.register(AgentDefinition(
+            name="scout_agent",
+            description="侦察",
+            agent_type=AgentType.WORKER,
+            capabilities=[],
+        ))
+        assert "scout_agent" not in [a.name for a in registry.list_by_type(AgentType.SPECIALIST)]
+        assert "scout_agent" not in [a.name for a in registry.list_by_capability(AgentCapability.PLANNING)]
+        assert len(registry.get_subagent_tools()) == tool_count
+        
+        registry.unregister("scout_agent")
+        assert registry.list_by_type(AgentType.WORKER) == []
+
+
+class TestPromptTemplate:
+    """Prompt 模板测试"""
+    
+    def test_render_coordinator_variables(self):
+        """测试协调器模板的 {name} 变量被替换"""
+        rendered = PromptManager().render("coordinator", current_status="正常", available_uavs="uav_1")
+        assert "{current_status}" not in rendered
+        assert rendered.endswith(coordinator_dynamic_suffix("正常", "uav_1"))
+    
+    def test_render_keeps_unknown_placeholders(self):
+        """测试兼容 $name 写法，未声明或未提供的变量原样保留"""
+        template = PromptTemplate("$a ${a} {a} {b} {c} $ab", ["a", "b"])
+        assert template.render(a=1) == "1 1 1 {b} {c} $ab"
+        assert PromptTemplate("{x}", []).render(x=1) == "{x}"
+    
+    def test_render_cache_distinguishes_types(self):
+        """测试相等但类型不同的参数不共用渲染缓存"""
+        manager = PromptManager()
+        manager.register("t", "x={v}", ["v"])
+        assert manager.render("t", v=1) == "x=1"
+        assert manager.render("t", v=True) == "x=True"
+        assert manager.render("t", v=1.0) == "x=1.0"
+        assert manager.render("t", v=1) == "x=1"
 
 
 class TestMockLLM:
@@ -125,6 +349,36 @@ class TestMockLLM:
         
         assert response.content == "这是测试响应"
     
+    @pytest.mark.asyncio
+    async def test_generate_many(self):
+        """测试批量请求并发执行、按输入顺序返回并隔离失败"""
+        llm = MockLLM(responses=["A"])
+        running = 0
+        peak = 0
+        generate = llm.generate
+        
+        async def tracked(messages, tools=None, **kwargs):
+            nonlocal running, peak
+            if not messages:
+                raise ValueError("空消息")
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            response = await generate(messages, tools)
+            response.content = messages[0]["content"]
+            return response
+        
+        llm.generate = tracked
+        requests = [{"messages": [{"role": "user", "content": str(i)}]} for i in range(5)]
+        requests.insert(2, {"messages": []})
+        
+        responses = await llm.generate_many(requests, max_concurrency=2)
+        
+        assert [r.content for r in responses] == ["0", "1", "", "2", "3", "4"]
+        assert responses[2].finish_reason == "error"
+        assert peak == 2
+    
     @pytest.mark.asyncio
     async def test_generate_stream(self):
         """测试流式生成"""
@@ -140,4 +394,324 @@ class TestMockLLM:
                 break
         
         assert "".join(content) == "Hello World"
+    
+    @pytest.mark.asyncio
+    async def test_generate_stream_chunked(self):
+        """测试流式输出按块切分"""
+        llm = MockLLM(responses=["Hello World"], chunk_size=4)
+        
+        chunks = [
+            e.content async for e in llm.generate_stream([{"role": "user", "content": "Hi"}])
+            if e.type == StreamEventType.CONTENT
+        ]
+        assert chunks == ["Hell", "o Wo", "rld"]
 
+
+class CachedMockLLM(MockLLM):
+    """带响应缓存的 MockLLM"""
+    
+    generate = cached_llm(MockLLM.generate)
+    generate_stream = cached_llm(MockLLM.generate_stream)
+
+
+class ToolCallMockLLM(MockLLM):
+    """每次返回一个工具调用的带缓存 MockLLM"""
+    
+    @cached_llm
+    async def generate(self, messages, tools=None, **kwargs):
+        return LLMResponse(tool_calls=[ToolCallRequest(name="takeoff", args={"altitude": 10})])
+    
+    @cached_llm
+    async def generate_stream(self, messages, tools=None, abort_signal=None, **kwargs):
+        yield StreamEvent.tool(ToolCallRequest(name="takeoff", args={"altitude": 10}))
+        yield StreamEvent(type=StreamEventType.FINISHED)
+
+
+class TestResponseCache:
+    """LLM 响应缓存测试"""
+    
+    MESSAGES = [{"role": "user", "content": "Hi"}]
+    
+    @pytest.mark.asyncio
+    async def test_generate_cached(self):
+        """测试相同请求命中缓存"""
+        llm = CachedMockLLM(LLMSettings(response_cache_size=4), responses=["A", "B"])
+        
+        first = await llm.generate(self.MESSAGES)
+        second = await llm.generate(self.MESSAGES)
+        other = await llm.generate([{"role": "user", "content": "Bye"}])
+        
+        assert first == second
+        assert first is not second
+        assert other.content == "B"
+        assert llm.get_response_cache_stats() == {"size": 2, "hits": 1, "misses": 2}
+    
+    @pytest.mark.asyncio
+    async def test_generate_stream_replayed(self):
+        """测试流式响应回放"""
+        llm = CachedMockLLM(LLMSettings(response_cache_size=4), responses=["AB", "CD"])
+        
+        async def collect():
+            return "".join([
+                e.content async for e in llm.generate_stream(self.MESSAGES)
+                if e.type == StreamEventType.CONTENT
+            ])
+        
+        assert await collect() == "AB"
+        assert await collect() == "AB"
+    
+    @pytest.mark.asyncio
+    async def test_cached_tool_args_isolated(self):
+        """测试修改返回的工具调用参数不影响缓存"""
+        llm = ToolCallMockLLM(LLMSettings(response_cache_size=4))
+        
+        first = await llm.generate(self.MESSAGES)
+        first.tool_calls[0].args = {"altitude": 50}
+        second = await llm.generate(self.MESSAGES)
+        second.tool_calls[0].args["altitude"] = 80
+        assert (await llm.generate(self.MESSAGES)).tool_calls[0].args == {"altitude": 10}
+        
+        async for event in llm.generate_stream(self.MESSAGES):
+            if event.tool_call:
+                event.tool_call.args = {"altitude": 50}
+        replayed = [e async for e in llm.generate_stream(self.MESSAGES) if e.tool_call]
+        assert replayed[0].tool_call.args == {"altitude": 10}
+        assert llm.get_response_cache_stats()["hits"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_cache_entry_expires(self):
+        """测试缓存条目过期后重新请求"""
+        llm = CachedMockLLM(
+            LLMSettings(response_cache_size=4, response_cache_ttl=0.01), responses=["A", "B"]
+        )
+        
+        assert (await llm.generate(self.MESSAGES)).content == "A"
+        await asyncio.sleep(0.02)
+        assert (await llm.generate(self.MESSAGES)).content == "B"
+        assert llm.get_response_cache_stats() == {"size": 1, "hits": 0, "misses": 2}
+    
+    @pytest.mark.asyncio
+    async def test_cache_disabled_by_default(self):
+        """测试默认不缓存"""
+        llm = CachedMockLLM(responses=["A", "B"])
+        
+        assert (await llm.generate(self.MESSAGES)).content == "A"
+        assert (await llm.generate(self.MESSAGES)).content == "B"
+
+
+class TestOpenAIStream:
+    """OpenAI 流式工具调用解析测试"""
+    
+    @staticmethod
+    def _chunk(index=None, call_id=None, name=None, arguments=None, finish_reason=None):
+        tool_calls = None
+        if index is not None:
+            function = SimpleNamespace(name=name, arguments=arguments)
+            tool_calls = [SimpleNamespace(index=index, id=call_id, function=function)]
+        delta = SimpleNamespace(content=None, tool_calls=tool_calls)
+        choice = SimpleNamespace(delta=delta, finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice])
+    
+    @pytest.mark.asyncio
+    async def test_tool_call_emitted_when_next_starts(self):
+        """测试上一个工具调用在下一个开始时即被发送"""
+        chunks = [
+            self._chunk(0, "c1", "status", '{"id"'),
+            self._chunk(0, arguments=": 1}"),
+            self._chunk(1, "c2", "move", '{"x": 2}'),
+            self._chunk(finish_reason="tool_calls"),
+        ]
+        received = []
+        
+        async def stream():
+            for chunk in chunks:
+                received.append(chunk)
+                yield chunk
+        
+        async def create(**kwargs):
+            return stream()
+        
+        llm = OpenAILLM()
+        llm._async_client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+        
+        events = []
+        async for event in llm.generate_stream([{"role": "user", "content": "Hi"}]):
+            events.append((event, len(received)))
+        
+        first, second = events[0], events[1]
+        assert first[0].tool_call.args == {"id": 1}
+        assert first[1] == 3
+        assert second[0].tool_call.call_id == "c2"
+        assert events[-1][0].type == StreamEventType.FINISHED
+
+
+class TestToolDedup:
+    """无副作用工具调用合并测试"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_pure_calls_share_execution(self, test_config):
+        """测试参数相同的并发纯工具调用只执行一次"""
+        definition = AgentDefinition(name="dedup", description="测试", pure_tools=["status"])
+        executors = [AgentExecutor(definition, config=test_config, llm=MockLLM()) for _ in range(2)]
+        calls = []
+        
+        async def execute(tool_name, args, call_id):
+            calls.append((tool_name, args))
+            await asyncio.sleep(0.01)
+            return ToolResult.success_result(call_id=call_id, content="ok")
+        
+        for executor in executors:
+            executor._execute_regular_tool = execute
+        
+        results = await asyncio.gather(
+            executors[0]._execute_tool("status", {"id": 1}, "c1"),
+            executors[1]._execute_tool("status", {"id": 1}, "c2"),
+            executors[0]._execute_tool("status", {"id": 2}, "c3"),
+            executors[0]._execute_tool("move", {"id": 1}, "c4"),
+        )
+        
+        assert len(calls) == 3
+        assert all(r.success for r in results)
+        assert [r.call_id for r in results] == ["c1", "c2", "c3", "c4"]
+    
+    @pytest.mark.asyncio
+    async def test_predefined_status_queries_shared(self, test_config):
+        """测试预定义代理的只读状态查询被合并执行"""
+        registry = get_agent_registry()
+        coordinator = AgentExecutor(registry.get("coordinator"), config=test_config, llm=MockLLM())
+        subagent = AgentExecutor(registry.get("formation_agent"), config=test_config, llm=MockLLM())
+        calls = []
+        
+        async def execute(tool_name, args, call_id):
+            calls.append(tool_name)
+            await asyncio.sleep(0.01)
+            return ToolResult.success_result(call_id=call_id, content="ok")
+        
+        for executor in (coordinator, subagent):
+            executor._execute_regular_tool = execute
+        
+        args = {"uav_id": "uav_1"}
+        await asyncio.gather(
+            coordinator._execute_tool("device_tool.get_status", args, "c1"),
+            subagent._execute_tool("device_tool.get_status", args, "c2"),
+            coordinator._execute_tool("device_tool.takeoff", args, "c3"),
+            subagent._execute_tool("device_tool.takeoff", args, "c4"),
+        )
+        
+        assert calls.count("device_tool.get_status") == 1
+        assert calls.count("device_tool.takeoff") == 2
+    
+    @pytest.mark.asyncio
+    async def test_waiter_reruns_when_owner_cancelled(self, test_config):
+        """测试执行方被取消时等待方自行执行而不是收到 CancelledError"""
+        definition = AgentDefinition(name="dedup", description="测试", pure_tools=["status"])
+        owner, waiter = (
+            AgentExecutor(definition, config=test_config, llm=MockLLM()) for _ in range(2)
+        )
+        started = asyncio.Event()
+        calls = []
+        
+        async def execute(tool_name, args, call_id):
+            calls.append(call_id)
+            started.set()
+            await asyncio.sleep(0.01)
+            return ToolResult.success_result(call_id=call_id, content="ok")
+        
+        owner._execute_regular_tool = execute
+        waiter._execute_regular_tool = execute
+        
+        owner_task = asyncio.ensure_future(owner._execute_tool("status", {}, "c1"))
+        await started.wait()
+        waiter_task = asyncio.ensure_future(waiter._execute_tool("status", {}, "c2"))
+        await asyncio.sleep(0)
+        owner_task.cancel()
+        
+        result = await waiter_task
+        assert owner_task.cancelled()
+        assert result.success and result.call_id == "c2"
+        assert calls == ["c1", "c2"]
+
+
+class TestExecutorPool:
+    """子代理执行器池测试"""
+    
+    @pytest.mark.asyncio
+    async def test_release_resets_and_reuses(self, test_config):
+        """测试归还的执行器被重置并复用"""
+        definition = AgentDefinition(name="pooled", description="测试")
+        builder = SubagentInvocationBuilder(test_config)
+        executor = AgentExecutor(definition, config=test_config, llm=MockLLM())
+        executor.on_stream_event(lambda event: None)
+        await executor.run("你好")
+        assert executor.context.message_count > 0
+        
+        builder.release(definition, executor)
+        assert builder.acquire(definition) is executor
+        assert executor.context.message_count == 0
+        assert executor.llm.get_history() == []
+        assert executor._stream_callbacks == []
+    
+    def test_pool_dropped_on_config_change(self, test_config):
+        """测试配置变更后池中执行器作废"""
+        definition = AgentDefinition(name="pooled", description="测试")
+        builder = SubagentInvocationBuilder(test_config)
+        executor = AgentExecutor(definition, config=test_config, llm=MockLLM())
+        builder.release(definition, executor)
+        
+        test_config.set_approval_mode(test_config.get_approval_mode())
+        other = AgentDefinition(name="other", description="测试")
+        builder.release(other, AgentExecutor(other, config=test_config, llm=MockLLM()))
+        assert "pooled" not in builder._executor_pool
+        assert len(builder._executor_pool["other"]) == 1
+
+
+class TestExecutorAbort:
+    """执行器中断测试"""
+    
+    @pytest.mark.asyncio
+    async def test_abort_cancels_inflight_turn(self, test_config):
+        """测试中断信号立即取消进行中的 LLM 调用"""
+        definition = AgentDefinition(name="abort", description="测试")
+        executor = AgentExecutor(definition, config=test_config, llm=MockLLM())
+        cancelled = asyncio.Event()
+        
+        async def slow_turn():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        executor._run_stream_turn = slow_turn
+        abort = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.01, abort.set)
+        
+        result = await asyncio.wait_for(executor.run("你好", abort_signal=abort), 1)
+        assert result.success
+        assert cancelled.is_set()
+    
+    @pytest.mark.asyncio
+    async def test_abort_clears_pending_tool_calls(self, test_config):
+        """测试工具执行中被中断后调度器不残留待处理调用"""
+        definition = AgentDefinition(name="abort", description="测试")
+        executor = AgentExecutor(definition, config=test_config, llm=MockLLM())
+        started = asyncio.Event()
+        
+        async def slow_tool(name, args, call_id):
+            started.set()
+            await asyncio.sleep(10)
+        
+        scheduler = executor.scheduler
+        scheduler._tool_executor = slow_tool
+        task = asyncio.create_task(scheduler.schedule(
+            [ToolCallRequest(name="device_tool.takeoff")], asyncio.Event()
+        ))
+        await asyncio.wait_for(started.wait(), 1)
+        assert scheduler._pending_calls
+        
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not scheduler._pending_calls
@@ -0,0 +1,140 @@
+"""
+CLI 模块测试
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from cli.commands import CommandHandler, Command, CommandResult
+from cli.repl import REPL
+from core.agent import AgentDefinition, AgentExecutor, MockLLM
+
+
+class EchoCommand(Command):
+    """测试用命令"""
+
+    name = "echo"
+    aliases = ["e"]
+    description = "回显参数"
+    usage = "echo [text]"
+
+    async def execute(self, args, repl=None) -> CommandResult:
+        return CommandResult(True, " ".join(args))
+
+
+class TestCommandHandler:
+    """CommandHandler 测试"""
+
+    @pytest.fixture
+    def handler(self, test_config):
+        return CommandHandler()
+
+    @pytest.mark.asyncio
+    async def test_help_output_cached(self, handler):
+        """测试 help 输出缓存"""
+        first = await handler.handle("help")
+        second = await handler.handle("help")
+        assert first.success
+        assert first is second
+        assert (await handler.handle("help st")) is (await handler.handle("help status"))
+
+    @pytest.mark.asyncio
+    async def test_help_cache_invalidated_on_register(self, handler):
+        """测试注册命令后 help 缓存失效"""
+        before = await handler.handle("help")
+        assert "echo" not in before.output
+
+        handler.register(EchoCommand())
+        after = await handler.handle("help")
+        assert "echo" in after.output
+
+    def test_get_command_by_alias(self, handler):
+        """测试通过名称、别名和斜杠前缀查找命令"""
+        help_cmd = handler.get_command("help")
+        assert help_cmd is not None
+        assert handler.get_command("h") is help_cmd
+        assert handler.get_command("/?") is help_cmd
+        assert handler.get_command("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_handle_parses_args(self, handler):
+        """测试命令与参数解析"""
+        handler.register(EchoCommand())
+        assert (await handler.handle("/ECHO")).output == ""
+        assert (await handler.handle("echo  a\tb")).output == "a b"
+        # 全角空格（中文输入法）同样作为分隔符
+        assert (await handler.handle("echo\u3000a")).output == "a"
+        assert not (await handler.handle("/")).success
+        assert not (await handler.handle("nope")).success
+
+    @pytest.mark.asyncio
+    async def test_status_reflects_mode_change(self, handler):
+        """测试切换审批模式后状态输出更新"""
+        await handler.handle("mode strict")
+        assert "审批模式: strict" in (await handler.handle("status")).output
+
+        await handler.handle("mode yolo")
+        assert "审批模式: yolo" in (await handler.handle("status")).output
+
+        await handler.handle("/mode\u3000strict")
+        assert "审批模式: strict" in (await handler.handle("status")).output
+
+    @pytest.mark.asyncio
+    async def test_mode_rejects_unknown(self, handler):
+        """测试未知审批模式"""
+        result = await handler.handle("mode turbo")
+        assert not result.success
+        assert "turbo" in result.output
+
+
+class TestREPLAbort:
+    """REPL 中断信号测试"""
+
+    @pytest.fixture
+    def repl(self, test_config):
+        repl = REPL(test_config)
+        repl._executor = AgentExecutor(
+            AgentDefinition(name="coordinator", description="测试"),
+            config=test_config,
+            llm=MockLLM(responses=["完成"]),
+        )
+        yield repl
+        repl.exit()
+
+    @pytest.mark.asyncio
+    async def test_run_with_repl_signal(self, repl):
+        """测试使用 REPL 的中断信号运行执行器"""
+        result = await asyncio.wait_for(
+            repl._executor.run("你好", abort_signal=repl._abort_signal), 1
+        )
+        assert result.success
+        assert result.content == "完成"
+
+    @pytest.mark.asyncio
+    async def test_cancel_from_other_thread(self, repl):
+        """测试从其他线程取消时执行器立即中断"""
+        repl._loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        async def slow_turn():
+            started.set()
+            await asyncio.sleep(10)
+
+        repl._executor._run_stream_turn = slow_turn
+        run = asyncio.ensure_future(
+            repl._executor.run("你好", abort_signal=repl._abort_signal)
+        )
+        await started.wait()
+        threading.Thread(target=repl.cancel_execution).start()
+
+        result = await asyncio.wait_for(run, 1)
+        assert result.success
+        assert repl._abort_signal.is_set()
+
+    @pytest.mark.asyncio
+    async def test_rejects_threading_event(self, repl):
+        """测试传入 threading.Event 时立即报错而不是阻塞事件循环"""
+        with pytest.raises(TypeError):
+            await repl._executor.run("你好", abort_signal=threading.Event())